@@ -9,132 +9,176 @@ Original file is located at
 # Imports
 """
 
-import re
-import nltk
-import spacy
-import string
-import pickle
-import itertools
+import time
 import numpy as np
 import pandas as pd
 import seaborn as sns
-from empath import Empath
-from nltk import tokenize
-import scipy.sparse as sp
-from sklearn import metrics
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.naive_bayes import ComplementNB
-from sklearn.metrics import confusion_matrix
 from sklearn.naive_bayes import MultinomialNB
-from sklearn.metrics import classification_report
-from sklearn.neighbors import KNeighborsClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import PassiveAggressiveClassifier
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
+from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from fake_news_detection.boosting import LayerSVDBoostingClassifier, per_article_latency
+from fake_news_detection.bundle import ModelBundle, training_hash
+from fake_news_detection.cache import FeatureCache
+from fake_news_detection.cleaning import clean_parallel
+from fake_news_detection.compact import StreamingTfidfVectorizer
+from fake_news_detection.dedup import drop_near_duplicates, summarize
+from fake_news_detection.evaluation import EvaluationEngine
+from fake_news_detection.ingest import load_dataset
+from fake_news_detection.naive_bayes import alpha_path_scores, best_alpha
+from fake_news_detection.neighbors import SparseCosineKNN
+from fake_news_detection.pipeline import article_texts
+from fake_news_detection.pos import POSTagger
+from fake_news_detection.profiling import StageProfiler
+from fake_news_detection.resources import ensure_nltk_resources
+from fake_news_detection.search import BestParams, SearchOrchestrator
+from fake_news_detection.selection import LayerSelector
+from fake_news_detection.semantics import EmpathFeaturizer, SemanticTfidf
+from fake_news_detection.statistics import LabelTermStats, cloud_tokens
+from fake_news_detection.store import FeatureStore
+from fake_news_detection.union import WeightedFeatureUnion
+from fake_news_detection.zoo import ModelZoo
+
+"""# Downloads
+
+Install the dependencies with ``pip install empath spacy nltk wordcloud``
+beforehand; NLTK corpora are only downloaded when they are missing.
+"""
 
-"""# Downloads"""
-
-!pip install empath
-nltk.download('words')
-nltk.download('wordnet')
-nltk.download('stopwords')
+ensure_nltk_resources(['words', 'wordnet', 'stopwords'])
 
 """# Configurations"""
 
 # To see more of the output
 pd.set_option('display.max_colwidth', 1000)
 
-"""# Utility Functions
-
-## Cleaning Function
-"""
-
-def clean_text(text):
-  text = re.sub('['+string.punctuation+']','', text)
-  text = re.sub(r"[-()\"#/@’;:<>{}`+=~|.!?,]", '', text)
-  text = text.lower().split()
-
-  stops = set(stopwords.words("english"))
-  text = [w for w in text if w not in stops]
-  text = " ".join(text)
-  
-  text = re.sub(r'[^a-zA-Z\s]', u'', text, flags=re.UNICODE)
-  
-  text = text.split()
-  l = WordNetLemmatizer()
-  lemmatized_words = [l.lemmatize(word) for word in text if len(word) > 2]
-  text = " ".join(lemmatized_words)
-    
-  return text
-
-"""## Confusion Matrix Configuration"""
-
-def plot_confusion_matrix(cm, classes, normalize=False, title='Confusion matrix', cmap=plt.cm.Blues):
-    plt.imshow(cm, interpolation='nearest', cmap=cmap)
-    plt.title(title)
-    plt.colorbar()
-    tick_marks = np.arange(len(classes))
-    plt.xticks(tick_marks, classes, rotation=0)
-    plt.yticks(tick_marks, classes)
-
-    thresh = cm.max() / 2.
-    for i, j in itertools.product(range(cm.shape[0]), range(cm.shape[1])):
-        plt.text(j, i, cm[i, j],
-                 horizontalalignment="center",
-                 color="white" if cm[i, j] > thresh else "black")
-
-    plt.tight_layout()
-    plt.ylabel('Actual label')
-    plt.xlabel('Predicted label')
-    plt.tight_layout()
-    plt.show()
+# Every stage below records wall/CPU time, memory and row/feature counts into
+# run_report.json; trace_memory adds tracemalloc peaks and profile_dir a cProfile
+# dump per top-level stage. Nothing is printed while the stages run.
+profiler = StageProfiler(trace_memory=False, profile_dir=None)
+
+# Compact vectorization of the fourth approach: text and POS vocabularies keep the
+# n-grams seen in at least compact_min_df training articles, counted under a
+# vectorization_budget_mb cap, and all layers use float32 values with int32 indices
+compact_vectorization = False
+compact_min_df = 2
+vectorization_budget_mb = 256
+
+# Articles whose word 5-shingles overlap at least dedup_threshold (estimated Jaccard
+# similarity of MinHash signatures) with an earlier article are dropped before
+# cleaning; every removal is listed in near_duplicates.csv. None keeps them all
+dedup_threshold = 0.8
+
+# Derived text layers are cached here, keyed by article hash and stage version
+feature_cache = FeatureCache('feature_cache')
+
+# Train/test TF-IDF matrices, labels and split rows of every layer are stored here
+# as memory-mappable arrays, keyed by vectorizer config and input data; reopen an
+# entry from another process with FeatureStore('feature_store').open(name). Only the
+# feature_store_keep most recently used entries of every layer are kept on disk
+feature_store_keep = 2
+feature_store = FeatureStore('feature_store', keep=feature_store_keep)
+
+# Worker processes (-1 for all cores) and articles per chunk for the cleaning stage
+cleaning_jobs = -1
+cleaning_chunk_size = 500
+
+# Texts per spaCy batch and processes used by the POS tagging stage
+pos_batch_size = 256
+pos_jobs = 1
+
+# Hyper-parameter searches are queued per feature set and run together just before
+# the models are fitted; their results are stored in best_params.json and applied
+# to the tuned models queued below
+hyper_search = SearchOrchestrator(cv=5, factor=3, n_jobs=-1)
+best_params = BestParams('best_params.json')
+
+# KNN uses top-k sparse products over the TF-IDF rows: cosine for the single-layer
+# approaches, euclidean for the weighted three-layer union (whose rows are not
+# unit-norm), as the KNeighborsClassifier it replaces. 'lsh' (cosine only) trades
+# recall for speed and only pays off on very large training sets
+knn_algorithm = 'brute'
+
+knn_distributions = {
+    "n_neighbors": list(range(1, 30)),
+    "weights": ['uniform', 'distance']
+}
+
+# Columns kept per layer for the tree models of the fourth approach (None keeps all),
+# scored by 'chi2', 'mutual_info' or 'df'
+layer_k = {'pos': None, 'text': 20000, 'sem': None}
+selection_method = 'chi2'
+
+# Dense width of every layer for the histogram boosting path, and which boosting
+# model of the fourth approach is saved: 'exact' (GradientBoostingClassifier) or 'hist'
+# (SVD-compressed layers + histogram boosting; opt-in until it has been validated
+# against the exact model, see the comparison table below)
+svd_components = {'pos': 100, 'text': 300, 'sem': 100}
+boosting_mode = 'exact'
+
+# Classifier x feature set fits are queued and run concurrently before the model
+# bundle is saved; training matrices are shared with the workers through
+# memory-mapped files (the feature store's own, or copies in /dev/shm where
+# available) instead of being copied. A fit
+# that raises is recorded in zoo.errors (and run_report.json) without stopping the
+# others; the shared files are removed on exit even if the script fails
+zoo = ModelZoo(n_jobs=-1)
+
+# Fitted models are queued and scored together at the end of the script: one
+# predict per model in parallel, results in evaluation_results.json and the
+# confusion matrices as PNGs in plot_dir (None to skip them)
+evaluation = EvaluationEngine(display_labels=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'], n_jobs=-1,
+                              plot_dir='confusion_matrices')
+
+rf_distributions = {
+    "n_estimators" : [200, 400, 600, 800, 1000],
+    "max_features" : ['sqrt', 'log2'],
+    "max_depth" : [10, 20, 30, 40, 50, None],
+    "min_samples_split" : [2, 5, 10],
+    "min_samples_leaf" : [1, 2, 4]
+}
 
 """# Dataset Importing
 
 ## Importing raw data
 """
 
-data = pd.read_csv("data.tsv", delimiter='\t', encoding='mac_roman')
-
-print(data.shape)
-print(data.columns)
-data.head()
-
-data2 = pd.read_csv("data2.tsv", delimiter='\t', encoding='mac_roman')
+# data2.tsv also contains lowercase 'false' rows that are left out; labels are
+# upper-cased while reading and a Parquet copy is reused while the TSVs are unchanged
+with profiler.stage('load_dataset') as stage:
+    data = stage.count(load_dataset([
+        ("data.tsv", ()),
+        ("data2.tsv", ('false',)),
+    ], cache_path="data.parquet"))
 
-indexNames = data2[data2['our rating'] == 'false'].index
-data2.drop(indexNames , inplace=True)
-
-print(data2.shape)
-print(data2.columns)
-data2.head()
-
-data = data.append(data2, ignore_index = True)
-
-print(data.shape)
 data.head()
 
 """## Data Manipulation
 
-### Label Capitalizing
+### Combining the **title** and **text** columns
 """
 
-data.loc[data['our rating'] == 'true', 'our rating'] = 'TRUE'
-data.loc[data['our rating'] == 'false', 'our rating'] = 'FALSE'
-data.loc[data['our rating'] == 'partially false', 'our rating'] = 'PARTIALLY FALSE'
-data.loc[data['our rating'] == 'other', 'our rating'] = 'OTHER'
+# Missing titles or texts count as empty strings, as in the command line tools
+data['text'] = article_texts(data)
 
 data.head()
 
-"""### Combining the **title** and **text** columns"""
+"""### Near-duplicate removal
 
-data['text'] = data['title'] + " " + data['text']
+Reposts and lightly edited copies of a story are collapsed to their first occurrence, so they are neither processed twice nor split across the train and test sets.
+Every removed article is listed in near_duplicates.csv and the counts are recorded in the run report.
+"""
 
-data.head()
+if dedup_threshold is not None:
+    with profiler.stage('dedup') as stage:
+        n_articles = len(data)
+        data, near_duplicates = drop_near_duplicates(data, data['text'].tolist(),
+                                                     threshold=dedup_threshold)
+        stage.count(data)
+        stage.set(**summarize(near_duplicates, n_articles))
+    near_duplicates.to_csv('near_duplicates.csv', index=False)
 
 """### Extra columns removal"""
 
@@ -154,190 +198,106 @@ data['our rating'].value_counts().plot(kind = 'bar')
 ### Creating an Additional Column with Cleaned Text
 """
 
-data['clean_text'] = data['text'].astype('str').apply(lambda x: clean_text(x))
+with profiler.stage('clean_text') as stage:
+    data['clean_text'] = stage.count(feature_cache.text_layer(
+        'clean_text', 'v1', data['text'].astype('str'),
+        lambda texts: clean_parallel(texts, n_jobs=cleaning_jobs, chunk_size=cleaning_chunk_size)))
 
 data.head()
 
 """## Data Exploration
 
-### Word Cloud View: FALSE Label
+Term frequencies of every label are counted in one pass over the articles
+and the word clouds are drawn from them.
 """
 
-fake_data = data[data["our rating"] == "FALSE"].astype('str')
-all_words = ' '.join([text for text in fake_data.text])
+text_stats = LabelTermStats.from_texts(data['text'].astype('str'), data['our rating'], analyzer=cloud_tokens)
 
-word_cloud = WordCloud(width = 1000, height = 1000, max_font_size = 110, collocations = False).generate(all_words)
+def show_word_cloud(stats, label):
+    word_cloud = WordCloud(width = 1000, height = 1000, max_font_size = 110, collocations = False)
+    word_cloud.generate_from_frequencies(stats.frequencies(label, word_cloud=True))
+    plt.figure(figsize = (10, 7))
+    plt.imshow(word_cloud, interpolation = 'bilinear')
+    plt.axis("off")
 
-plt.figure(figsize = (10, 7))
-plt.imshow(word_cloud, interpolation = 'bilinear')
-plt.axis("off")
+"""### Word Cloud View: FALSE Label"""
 
-"""### Word Cloud View: TRUE Label"""
+show_word_cloud(text_stats, "FALSE")
 
-true_data = data[data["our rating"] == "TRUE"].astype('str')
-all_words = ' '.join([text for text in true_data.text])
+"""### Word Cloud View: TRUE Label"""
 
-word_cloud = WordCloud(width = 1000, height = 1000, max_font_size = 110, collocations = False).generate(all_words)
-plt.figure(figsize = (10, 7))
-plt.imshow(word_cloud, interpolation = 'bilinear')
-plt.axis("off")
+show_word_cloud(text_stats, "TRUE")
 
 """### Word Cloud View: PARTIALLY FALSE Label"""
 
-partially_false_data = data[data["our rating"] == "PARTIALLY FALSE"].astype('str')
-all_words = ' '.join([text for text in partially_false_data.text])
-
-word_cloud = WordCloud(width = 1000, height = 1000, max_font_size = 110, collocations = False).generate(all_words)
-plt.figure(figsize = (10, 7))
-plt.imshow(word_cloud, interpolation = 'bilinear')
-plt.axis("off")
+show_word_cloud(text_stats, "PARTIALLY FALSE")
 
 """### Word Cloud View: OTHER Label"""
 
-other_data = data[data["our rating"] == "OTHER"].astype('str')
-all_words = ' '.join([text for text in other_data.text])
-
-word_cloud = WordCloud(width = 1000, height = 1000, max_font_size = 110, collocations = False).generate(all_words)
-plt.figure(figsize = (10, 7))
-plt.imshow(word_cloud, interpolation = 'bilinear')
-plt.axis("off")
+show_word_cloud(text_stats, "OTHER")
 
 """## Train and Test Split"""
 
 y = data['our rating'].astype('str') 
 X_train, X_test, y_train, y_test = train_test_split(data['clean_text'], y, test_size = 0.2, random_state = 42)
 
-print(X_train.head())
-print()
-print(y_train.head())
-
 """## TFIDF Vectorization"""
 
-tfidf_vectorizer = TfidfVectorizer(stop_words = 'english', ngram_range = (2, 2))
-
-tfidf_train = tfidf_vectorizer.fit_transform(X_train)
-
-tfidf_test = tfidf_vectorizer.transform(X_test)
-
-print(tfidf_vectorizer.get_feature_names()[:100])
+with profiler.stage('tfidf/vectorize') as stage:
+    tfidf_features = feature_store.layer('tfidf', TfidfVectorizer(stop_words = 'english', ngram_range = (2, 2)),
+                                         X_train, X_test, y_train, y_test)
+    tfidf_train, tfidf_test = stage.count(tfidf_features.train), tfidf_features.test
+    stage.set(cached=tfidf_features.cached)
+tfidf_train = zoo.add_feature_set('tfidf', tfidf_features.handle('train'), y_train)
+evaluation.add_feature_set('tfidf', tfidf_test, y_test)
 
 """## Model Testing
 
 ### Naive-Bayes Alpha-Tuning
 """
 
-alphas = np.arange(0, 1, 0.1)
-
-def train_and_predict(alpha, x_train, x_test):
-    nb_classifier = MultinomialNB(alpha=alpha)
-    nb_classifier.fit(x_train, y_train)
-    pred = nb_classifier.predict(x_test)
-    score = metrics.accuracy_score(y_test, pred)
-    return score
+# alpha=0 gives infinite log-probabilities; the whole grid is scored in one pass
+alphas = np.linspace(0.01, 1, 100)
 
-for alpha in alphas:
-  print('Alpha: ', alpha)
-  print('Score: ', train_and_predict(alpha, tfidf_train, tfidf_test))
-  print()
+with profiler.stage('tfidf/nb/alpha_path', alphas=len(alphas)) as stage:
+    nb_scores = alpha_path_scores(stage.count(tfidf_train), y_train, alphas, tfidf_test, y_test, cv=5)
+nb_scores.nlargest(5, 'cv_mean')
 
 """### Naive-Bayes (with best parameters)"""
 
-nb_classifier = MultinomialNB(alpha=0.0)
-nb_classifier.fit(tfidf_train, y_train)
-
-pred = nb_classifier.predict(tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('tfidf/nb', 'tfidf', MultinomialNB(alpha=best_alpha(nb_scores)))
 
 """### K Nearest Neighbors Hyper-Parameter Tuning"""
 
-knn_params = RandomizedSearchCV(estimator=KNeighborsClassifier(), param_distributions={
-    "leaf_size": list(range(1, 50)),
-    "n_neighbors": list(range(1, 30)),
-    "p": [1, 2]
-}, n_iter=100, n_jobs=-1)
-
-result = knn_params.fit(tfidf_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
-
-print(result_df["params"])
+hyper_search.add_feature_set('tfidf', tfidf_train, y_train)
+hyper_search.add_search('knn', 'tfidf', SparseCosineKNN(algorithm=knn_algorithm), knn_distributions, n_candidates=50)
 
 """### K Nearest Neighbors (with best parameters)"""
 
-knn_classifier = KNeighborsClassifier(p=2, n_neighbors=29, leaf_size=17)
-knn_classifier.fit(tfidf_train, y_train)
-
-pred = knn_classifier.predict(tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('tfidf/knn', 'tfidf', SparseCosineKNN(algorithm=knn_algorithm, **best_params.get('knn', 'tfidf', n_neighbors=29)))
 
 """### Random Forest Hyper-Parameter Tuning"""
 
-rf_params = RandomizedSearchCV(estimator=RandomForestClassifier(), param_distributions={
-    "n_estimators" : [200, 400, 600, 800, 1000],
-    "max_features" : ['auto', 'sqrt'],
-    "max_depth" : [10, 20, 30, 40, 50, None],
-    "min_samples_split" : [2, 5, 10],
-    "min_samples_leaf" : [1, 2, 4]
-}, n_iter=10, n_jobs=-1)
-
-result = rf_params.fit(tfidf_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
-
-print(result_df["params"])
+hyper_search.add_search('rf', 'tfidf', RandomForestClassifier(), rf_distributions, n_candidates=10)
 
 """
 ### Random Forest (with best parameters)"""
 
-rf_classifier = RandomForestClassifier(verbose=True, n_estimators = 1000, max_features = 'sqrt', max_depth = 50, min_samples_split = 2, min_samples_leaf = 2)
-rf_classifier.fit(tfidf_train, y_train)
-
-pred = rf_classifier.predict(tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('tfidf/rf', 'tfidf', RandomForestClassifier(**best_params.get('rf', 'tfidf', n_estimators=1000, max_features='sqrt', max_depth=50, min_samples_split=2, min_samples_leaf=2)))
 
 """### Gradient Boosting (with default parameters)"""
 
-gb_classifier = GradientBoostingClassifier(verbose=True, n_estimators = 200)
-gb_classifier.fit(tfidf_train, y_train)
-
-pred = gb_classifier.predict(tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('tfidf/gb', 'tfidf', GradientBoostingClassifier(n_estimators = 200))
 
 """# Second Approach - POS Tagging
 
 ## Data Preparation
 """
 
-nlp = spacy.load('en')
-pos_tags_column = []
-
-for text in data['text'].astype('str'):
-    pos_tags = []
-    doc = nlp(text)
-    for token in doc:
-        pos_tags.append(token.pos_)
-    all_pos_tags = ' '.join(pos_tags)
-    pos_tags_column.append(all_pos_tags)
-    
-data['POS_text'] = pos_tags_column
+pos_tagger = POSTagger(model='en', batch_size=pos_batch_size, n_process=pos_jobs)
+with profiler.stage('pos_tagging') as stage:
+    data['POS_text'] = stage.count(feature_cache.text_layer(
+        'POS_text', 'v1-en', data['text'].astype('str'), pos_tagger.tag_many))
 
 data.head()
 
@@ -346,300 +306,162 @@ data.head()
 ### Counter Function
 """
 
-token_space = tokenize.WhitespaceTokenizer()
-
-def counter(text, column_text, quantity):
-    words = ' '.join([text for text in text[column_text]])
-    token_phrase = token_space.tokenize(words)
-    frequency = nltk.FreqDist(token_phrase)
-    df_frequency = pd.DataFrame({"Word": list(frequency.keys()), "Frequency": list(frequency.values())})
-    df_frequency = df_frequency.nlargest(columns="Frequency", n=quantity)
+def counter(stats, label, quantity):
+    df_frequency = stats.top(label, quantity)
     plt.figure(figsize=(12, 8))
     ax = sns.barplot(data=df_frequency, x="Word", y="Frequency", color='blue')
     ax.set(ylabel="Count")
     plt.xticks(rotation='vertical')
-    plt.show()
+    plt.show(block=False)
+
+pos_stats = LabelTermStats.from_texts(data['POS_text'], data['our rating'])
 
 """### Most Frequent POS in FALSE Labeled texts"""
 
-counter(data[data["our rating"] == "FALSE"], "POS_text", 20)
+counter(pos_stats, "FALSE", 20)
 
 """### Most Frequent POS in TRUE Labeled texts"""
 
-counter(data[data["our rating"] == "TRUE"], "POS_text", 20)
+counter(pos_stats, "TRUE", 20)
 
 """### Most Frequent POS in PARTIALLY FALSE Labeled texts"""
 
-counter(data[data["our rating"] == "PARTIALLY FALSE"], "POS_text", 20)
+counter(pos_stats, "PARTIALLY FALSE", 20)
 
 """### Most Frequent POS in OTHER Labeled texts"""
 
-counter(data[data["our rating"] == "OTHER"], "POS_text", 20)
+counter(pos_stats, "OTHER", 20)
 
 """## Train and Test Split"""
 
 y = data['our rating'].astype('str')
 X_train, X_test, y_train, y_test = train_test_split(data['POS_text'], y, test_size = 0.2, random_state = 42)
 
-print(X_train.head())
-print(y_train.head())
-
 """## TFIDF Vectorization"""
 
-pos_tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (2,2))
-pos_tfidf_train = pos_tfidf_vectorizer.fit_transform(X_train.astype('str'))
-pos_tfidf_test= pos_tfidf_vectorizer.transform(X_test.astype('str'))
-pos_tfidf_vectorizer.get_feature_names()[:10]
+with profiler.stage('pos/vectorize') as stage:
+    pos_features = feature_store.layer('pos', TfidfVectorizer(stop_words='english', ngram_range = (2,2)),
+                                       X_train.astype('str'), X_test.astype('str'), y_train, y_test)
+    pos_tfidf_train, pos_tfidf_test = stage.count(pos_features.train), pos_features.test
+    stage.set(cached=pos_features.cached)
+pos_tfidf_train = zoo.add_feature_set('pos', pos_features.handle('train'), y_train)
+evaluation.add_feature_set('pos', pos_tfidf_test, y_test)
 
 """## Model Testing
 
 ### Naive-Bayes Alpha-Tuning
 """
 
-for alpha in alphas:
-  print('Alpha: ', alpha)
-  print('Score: ', train_and_predict(alpha, pos_tfidf_train, pos_tfidf_test))
-  print()
+with profiler.stage('pos/nb/alpha_path', alphas=len(alphas)) as stage:
+    nb_scores = alpha_path_scores(stage.count(pos_tfidf_train), y_train, alphas, pos_tfidf_test, y_test, cv=5)
+nb_scores.nlargest(5, 'cv_mean')
 
 """### Naive-Bayes (with best parameters)"""
 
-nb_classifier = MultinomialNB(alpha = 0.0)
-nb_classifier.fit(pos_tfidf_train, y_train)
-
-pred = nb_classifier.predict(pos_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('pos/nb', 'pos', MultinomialNB(alpha=best_alpha(nb_scores)))
 
 """### K Nearest Neighbors Hyper-Parameter Tuning"""
 
-knn_params = RandomizedSearchCV(estimator=KNeighborsClassifier(), param_distributions={
-    "leaf_size": list(range(1, 50)),
-    "n_neighbors": list(range(1, 30)),
-    "p": [1, 2]
-}, n_iter=100, n_jobs=-1)
-
-result = knn_params.fit(pos_tfidf_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
-
-print(result_df["params"])
+hyper_search.add_feature_set('pos', pos_tfidf_train, y_train)
+hyper_search.add_search('knn', 'pos', SparseCosineKNN(algorithm=knn_algorithm), knn_distributions, n_candidates=50)
 
 """### K Nearest Neighbors (with best parameters)"""
 
-knn_classifier = KNeighborsClassifier(p = 1, n_neighbors = 25, leaf_size = 35)
-knn_classifier.fit(pos_tfidf_train, y_train)
-
-pred = knn_classifier.predict(pos_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('pos/knn', 'pos', SparseCosineKNN(algorithm=knn_algorithm, **best_params.get('knn', 'pos', n_neighbors=25)))
 
 """### Random Forest Hyper-Parameter Tuning"""
 
-rf_params = RandomizedSearchCV(estimator=RandomForestClassifier(), param_distributions={
-    "n_estimators" : [200, 400, 600, 800, 1000],
-    "max_features" : ['auto', 'sqrt'],
-    "max_depth" : [10, 20, 30, 40, 50, None],
-    "min_samples_split" : [2, 5, 10],
-    "min_samples_leaf" : [1, 2, 4]
-}, n_iter=10, n_jobs=-1)
-
-result = rf_params.fit(pos_tfidf_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
-
-print(result_df["params"])
+hyper_search.add_search('rf', 'pos', RandomForestClassifier(), rf_distributions, n_candidates=10)
 
 """### Random Forest (with best parameters)"""
 
-rf_classifier = RandomForestClassifier(n_estimators = 400, min_samples_split = 10, min_samples_leaf = 4, max_features = 'sqrt', max_depth = 30)
-rf_classifier.fit(pos_tfidf_train, y_train)
-
-pred = rf_classifier.predict(pos_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('pos/rf', 'pos', RandomForestClassifier(**best_params.get('rf', 'pos', n_estimators=400, min_samples_split=10, min_samples_leaf=4, max_features='sqrt', max_depth=30)))
 
 """### Gradient Boosting (with default parameters)"""
 
-gb_classifier = GradientBoostingClassifier(verbose=True, n_estimators = 200)
-gb_classifier.fit(pos_tfidf_train, y_train)
-
-pred = gb_classifier.predict(pos_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('pos/gb', 'pos', GradientBoostingClassifier(n_estimators = 200))
 
 """# Third Approach - Semantic Analysis
 
 ## Data Preparation
 """
 
-lexicon = Empath()
-semantic = []
-count = 0
-
-for article in data['text'].astype('str'):
-    print(article)
-    d = lexicon.analyze(article, normalize=False)
-    print(d)
-    x = []
-    for key, value in d.items():
-        x.append(value)
-    x = np.asarray(x)
-    semantic.append(x)
-data['semantic_text'] = semantic
-
-print(data['semantic_text'].head())
-
-categories = []
-a = lexicon.analyze("")
-for key, value in a.items():
-    categories.append(key)
-    
-categories
-
-sem = []
-for i in range(data.shape[0]):
-    a = []
-    for j in range(len(semantic[0])):
-        for k in range(int(semantic[i][j])):
-            a.append(categories[j])
-    b = " ".join(a)
-    sem.append(b)
-data['semantics_text'] = sem
-
-print(data['semantics_text'].head())
+with profiler.stage('empath') as stage:
+    empath_featurizer = EmpathFeaturizer()
+    categories = empath_featurizer.categories
+    semantic_counts = stage.count(feature_cache.sparse_layer(
+        'semantic_counts', 'v1-{}'.format(len(categories)), data['text'].astype('str'),
+        empath_featurizer.transform, len(categories)))
 
 """## Data Exploration
 
 ### Most Frequent Subjects in FALSE Labeled texts
 """
 
-counter(data[data["our rating"] == "FALSE"], "semantics_text", 20)
+sem_stats = LabelTermStats.from_counts(semantic_counts, data['our rating'], categories)
+
+counter(sem_stats, "FALSE", 20)
 
 """### Most Frequent Subjects in TRUE Labeled texts"""
 
-counter(data[data["our rating"] == "TRUE"], "semantics_text", 20)
+counter(sem_stats, "TRUE", 20)
 
 """### Most Frequent Subjects in PARTIALLY FALSE Labeled texts"""
 
-counter(data[data["our rating"] == "PARTIALLY FALSE"], "semantics_text", 20)
+counter(sem_stats, "PARTIALLY FALSE", 20)
 
 """### Most Frequent Subjects in OTHER Labeled texts"""
 
-counter(data[data["our rating"] == "OTHER"], "semantics_text", 20)
+counter(sem_stats, "OTHER", 20)
 
 """## Train and Test Split"""
 
 y = data['our rating'].astype('str')
-X_train, X_test, y_train, y_test = train_test_split(data['semantics_text'], y, test_size = 0.2, random_state = 42)
-
-print(X_train.head())
-print(y_train.head())
+X_train, X_test, y_train, y_test = train_test_split(semantic_counts, y, test_size = 0.2, random_state = 42)
 
 """## TFIDF Vectorizer"""
 
-sem_tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1,1))
-sem_tfidf_train = sem_tfidf_vectorizer.fit_transform(X_train.astype('str'))
-sem_tfidf_test = sem_tfidf_vectorizer.transform(X_test.astype('str'))
+with profiler.stage('sem/vectorize') as stage:
+    sem_features = feature_store.layer('sem', SemanticTfidf(categories, stop_words='english'),
+                                       X_train, X_test, y_train, y_test)
+    sem_tfidf_train, sem_tfidf_test = stage.count(sem_features.train), sem_features.test
+    stage.set(cached=sem_features.cached)
+sem_tfidf_train = zoo.add_feature_set('sem', sem_features.handle('train'), y_train)
+evaluation.add_feature_set('sem', sem_tfidf_test, y_test)
 
 """## Model Testing
 
 ### Naive-Bayes Alpha-Tuning
 """
 
-for alpha in alphas:
-  print('Alpha: ', alpha)
-  print('Score: ', train_and_predict(alpha, sem_tfidf_train, sem_tfidf_test))
-  print()
+with profiler.stage('sem/nb/alpha_path', alphas=len(alphas)) as stage:
+    nb_scores = alpha_path_scores(stage.count(sem_tfidf_train), y_train, alphas, sem_tfidf_test, y_test, cv=5)
+nb_scores.nlargest(5, 'cv_mean')
 
 """### Naive-Bayes (with best parameters)"""
 
-nb_classifier = MultinomialNB(alpha=0.1)
-nb_classifier.fit(sem_tfidf_train, y_train)
-
-pred = nb_classifier.predict(sem_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('sem/nb', 'sem', MultinomialNB(alpha=best_alpha(nb_scores)))
 
 """### K Nearest Neighbors Hyper-Parameter Tuning"""
 
-knn_params = RandomizedSearchCV(estimator=KNeighborsClassifier(), param_distributions={
-    "leaf_size": list(range(1, 50)),
-    "n_neighbors": list(range(1, 30)),
-    "p": [1, 2]
-}, n_iter=100, n_jobs=-1)
-
-result = knn_params.fit(sem_tfidf_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
-
-print(result_df["params"])
+hyper_search.add_feature_set('sem', sem_tfidf_train, y_train)
+hyper_search.add_search('knn', 'sem', SparseCosineKNN(algorithm=knn_algorithm), knn_distributions, n_candidates=50)
 
 """### K Nearest Neighbors (with best parameters)"""
 
-knn_classifier = KNeighborsClassifier(p = 2, n_neighbors = 27, leaf_size = 12)
-knn_classifier.fit(sem_tfidf_train, y_train)
-
-pred = knn_classifier.predict(sem_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('sem/knn', 'sem', SparseCosineKNN(algorithm=knn_algorithm, **best_params.get('knn', 'sem', n_neighbors=27)))
 
 """### Random Forest Hyper-Parameter Tuning"""
 
-rf_params = RandomizedSearchCV(estimator=RandomForestClassifier(), param_distributions={
-    "n_estimators" : [200, 400, 600, 800, 1000],
-    "max_features" : ['auto', 'sqrt'],
-    "max_depth" : [10, 20, 30, 40, 50, None],
-    "min_samples_split" : [2, 5, 10],
-    "min_samples_leaf" : [1, 2, 4]
-}, n_iter=10, n_jobs=-1)
-
-result = rf_params.fit(sem_tfidf_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
-
-print(result_df["params"])
+hyper_search.add_search('rf', 'sem', RandomForestClassifier(), rf_distributions, n_candidates=10)
 
 """### Random Forest (with best parameters)"""
 
-rf_classifier = RandomForestClassifier(n_estimators = 200, min_samples_split = 10, min_samples_leaf = 1, max_features = 'sqrt', max_depth = 30)
-rf_classifier.fit(sem_tfidf_train, y_train)
-
-pred = rf_classifier.predict(sem_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('sem/rf', 'sem', RandomForestClassifier(**best_params.get('rf', 'sem', n_estimators=200, min_samples_split=10, min_samples_leaf=1, max_features='sqrt', max_depth=30)))
 
 """### Gradient Boosting (with default parameters)"""
 
-gb_classifier = GradientBoostingClassifier(verbose=True, n_estimators = 200)
-gb_classifier.fit(sem_tfidf_train, y_train)
-
-pred = gb_classifier.predict(sem_tfidf_test)
-print(classification_report(y_test, pred))
-
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+zoo.add_model('sem/gb', 'sem', GradientBoostingClassifier(n_estimators = 200))
 
 """# Fourth Approach - Three-Layered Classification
 
@@ -648,59 +470,52 @@ plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
 
 X = data.drop('our rating', axis = 1)
 y = data['our rating']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size = 0.2, random_state = 42)
+X_train, X_test, X_train_sem, X_test_sem, y_train, y_test = train_test_split(X, semantic_counts, y, test_size = 0.2, random_state = 42)
 
 """## Train and Test Splitting"""
 
+X_train_text_raw = X_train['text']
+
 X_train_text = X_train['clean_text']
 X_test_text = X_test['clean_text']
 
 X_train_POS = X_train['POS_text']
 X_test_POS = X_test['POS_text']
 
-X_train_sem = X_train['semantics_text']
-X_test_sem = X_test['semantics_text']
-
 """### TFIDF"""
 
-tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (1,3))
-tfidf_train = tfidf_vectorizer.fit_transform(X_train_text.astype('str'))
-tfidf_test = tfidf_vectorizer.transform(X_test_text.astype('str'))
-
-tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (1,3))
-tfidf_vectorizer.fit(X_train_text.astype('str'))
+def layer_vectorizer():
+    if compact_vectorization:
+        return StreamingTfidfVectorizer((1, 3), stop_words='english', min_df=compact_min_df,
+                                        memory_budget_mb=vectorization_budget_mb)
+    return TfidfVectorizer(stop_words='english', ngram_range = (1,3))
 
-from sklearn import model_selection
-import pickle
+layer_dtype = np.float32 if compact_vectorization else np.float64
 
-pickled_tfidf = 'tfidf_pickle.sav'
-pickle.dump(tfidf_vectorizer, open(pickled_tfidf, 'wb'))
+with profiler.stage('three_layer/vectorize/text') as stage:
+    text_features = feature_store.layer('three_layer/text', layer_vectorizer(),
+                                        X_train_text.astype('str'), X_test_text.astype('str'), y_train, y_test)
+    tfidf_train, tfidf_test = stage.count(text_features.train), text_features.test
+    tfidf_vectorizer = text_features.vectorizer
+    stage.set(cached=text_features.cached)
 
 """### POS Tagging"""
 
-pos_tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (1,3))
-pos_tfidf_train = pos_tfidf_vectorizer.fit_transform(X_train_POS.astype('str'))
-
-pos_tfidf_test = pos_tfidf_vectorizer.transform(X_test_POS.astype('str'))
-
-pos_tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (1,3))
-pos_tfidf_vectorizer.fit(X_train_POS.astype('str'))
-
-pickled_pos = 'pos_pickle.sav'
-pickle.dump(pos_tfidf_vectorizer, open(pickled_pos, 'wb'))
+with profiler.stage('three_layer/vectorize/pos') as stage:
+    pos_features = feature_store.layer('three_layer/pos', layer_vectorizer(),
+                                       X_train_POS.astype('str'), X_test_POS.astype('str'), y_train, y_test)
+    pos_tfidf_train, pos_tfidf_test = stage.count(pos_features.train), pos_features.test
+    pos_tfidf_vectorizer = pos_features.vectorizer
+    stage.set(cached=pos_features.cached)
 
 """### Semantic Analysis"""
 
-sem_tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (1,1))
-sem_tfidf_train = sem_tfidf_vectorizer.fit_transform(X_train_sem.astype('str'))
-
-sem_tfidf_test = sem_tfidf_vectorizer.transform(X_test_sem.astype('str'))
-
-sem_tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range = (1,1))
-sem_tfidf_vectorizer.fit(X_train_sem.astype('str'))
-
-pickled_sem = 'sem_pickle.sav'
-pickle.dump(sem_tfidf_vectorizer, open(pickled_sem, 'wb'))
+with profiler.stage('three_layer/vectorize/sem') as stage:
+    sem_features = feature_store.layer('three_layer/sem', SemanticTfidf(categories, stop_words='english', dtype=layer_dtype),
+                                       X_train_sem, X_test_sem, y_train, y_test)
+    sem_tfidf_train, sem_tfidf_test = stage.count(sem_features.train), sem_features.test
+    sem_tfidf_vectorizer = sem_features.vectorizer
+    stage.set(cached=sem_features.cached)
 
 """### Weight Setting"""
 
@@ -708,130 +523,196 @@ text_w = 0.5 * 3
 pos_w = 0.15 * 3
 sem_w = 0.35 * 3
 
-tfidf_train *= text_w
-tfidf_test *= text_w
-pos_tfidf_train *= pos_w
-pos_tfidf_test *= pos_w
-sem_tfidf_train *= sem_w
-sem_tfidf_test *= sem_w
+# Columns are laid out as POS | text | semantics
+feature_union = WeightedFeatureUnion([
+    ('pos', pos_tfidf_vectorizer, pos_w),
+    ('text', tfidf_vectorizer, text_w),
+    ('sem', sem_tfidf_vectorizer, sem_w),
+], dtype=layer_dtype)
+
+with profiler.stage('three_layer/union') as stage:
+    union_features = feature_store.get_or_build(
+        'three_layer', {'weights': feature_union.weights, 'dtype': feature_union.dtype},
+        [pos_features.key, text_features.key, sem_features.key],
+        lambda: (feature_union.combine([pos_tfidf_train, tfidf_train, sem_tfidf_train]),
+                 feature_union.combine([pos_tfidf_test, tfidf_test, sem_tfidf_test]), None),
+        y_train, y_test)
+    X_train, X_test = stage.count(union_features.train), union_features.test
+    stage.set(cached=union_features.cached)
+
+"""### Matrix Size
+
+Columns and in-memory size of every training block and of the combined
+matrix; ``benchmarks/bench_compact.py`` compares both vectorization modes
+side by side, accuracy included.
+"""
+
+def matrix_mb(matrix):
+    return (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 2 ** 20
 
-diff_n_rows = pos_tfidf_train.shape[0] - tfidf_train.shape[0]
-b = sp.vstack((tfidf_train, sp.csr_matrix((diff_n_rows, tfidf_train.shape[1]))))
-c = sp.hstack((pos_tfidf_train, b))
+matrix_sizes = pd.DataFrame([
+    {'matrix': name, 'columns': matrix.shape[1], 'nnz': matrix.nnz, 'dtype': matrix.dtype.name,
+     'index_dtype': matrix.indices.dtype.name, 'size_mb': matrix_mb(matrix)}
+    for name, matrix in [('pos', pos_tfidf_train), ('text', tfidf_train), ('sem', sem_tfidf_train), ('combined', X_train)]
+])
+matrix_sizes
 
-diff_n_rows = c.shape[0] - sem_tfidf_train.shape[0]
-b = sp.vstack((sem_tfidf_train, sp.csr_matrix((diff_n_rows, sem_tfidf_train.shape[1]))))
+"""### Shared Training Matrix"""
 
-X_train = sp.hstack((c, b))
+X_train = zoo.add_feature_set('three_layer', union_features.handle('train'), y_train)
+evaluation.add_feature_set('three_layer', X_test, y_test)
 
-diff_n_rows = pos_tfidf_test.shape[0] - tfidf_test.shape[0]
-d = sp.vstack((tfidf_test, sp.csr_matrix((diff_n_rows, tfidf_test.shape[1]))))
-e = sp.hstack((pos_tfidf_test, d))
+"""### Feature Selection
+
+Most text columns are n-grams seen in a single article. The tree models
+below are trained on the best ``layer_k`` columns of each layer; the
+selection is part of ``selected_union`` and is saved with the model.
+"""
 
-diff_n_rows = e.shape[0] - sem_tfidf_test.shape[0]
-d = sp.vstack((sem_tfidf_test, sp.csr_matrix((diff_n_rows, sem_tfidf_test.shape[1]))))
+layer_selector = LayerSelector(layer_k, method=selection_method, min_df=2)
+with profiler.stage('three_layer/selection', input_features=X_train.shape[1]) as stage:
+    selected_union, selected_train = layer_selector.fit(feature_union, [pos_tfidf_train, tfidf_train, sem_tfidf_train], y_train)
+    selected_test = layer_selector.transform(feature_union, [pos_tfidf_test, tfidf_test, sem_tfidf_test])
 
-X_test = sp.hstack((e, d))
+    X_train_selected = stage.count(selected_union.combine(selected_train))
+    X_test_selected = selected_union.combine(selected_test)
+X_train_selected = zoo.add_feature_set('three_layer_selected', X_train_selected, y_train)
+evaluation.add_feature_set('three_layer_selected', X_test_selected, y_test)
 
 """## Model Testing
 
 ### Naive-Bayes Alpha-Tuning
 """
 
-for alpha in alphas:
-  print('Alpha: ', alpha)
-  print('Score: ', train_and_predict(alpha, X_train, X_test))
-  print()
+with profiler.stage('three_layer/nb/alpha_path', alphas=len(alphas)) as stage:
+    nb_scores = alpha_path_scores(stage.count(X_train), y_train, alphas, X_test, y_test, cv=5)
+nb_scores.nlargest(5, 'cv_mean')
 
 """### Naive-Bayes (with best parameters)"""
 
-nb_classifier = MultinomialNB(alpha = 0.0)
-nb_classifier.fit(X_train, y_train)
+zoo.add_model('three_layer/nb', 'three_layer', MultinomialNB(alpha=best_alpha(nb_scores)))
 
-pred = nb_classifier.predict(X_test)
-print(classification_report(y_test, pred))
+"""### K Nearest Neighbors Hyper-Parameter Tuning"""
 
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+hyper_search.add_feature_set('three_layer', X_train, y_train)
+hyper_search.add_search('knn', 'three_layer', SparseCosineKNN(algorithm='brute', metric='euclidean'), knn_distributions, n_candidates=50)
 
-"""### K Nearest Neighbors Hyper-Parameter Tuning"""
+"""### K Nearest Neighbors (with best parameters)"""
 
-knn_params = RandomizedSearchCV(estimator=KNeighborsClassifier(), param_distributions={
-    "leaf_size": list(range(1, 50)),
-    "n_neighbors": list(range(1, 30)),
-    "p": [1, 2]
-}, n_iter=100, n_jobs=-1)
+zoo.add_model('three_layer/knn', 'three_layer', SparseCosineKNN(algorithm='brute', metric='euclidean', **best_params.get('knn', 'three_layer', n_neighbors=19)))
 
-result = knn_params.fit(X_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
+"""### Random Forest Hyper-Parameter Tuning"""
 
-print(result_df["params"])
+hyper_search.add_feature_set('three_layer_selected', X_train_selected, y_train)
+hyper_search.add_search('rf', 'three_layer_selected', RandomForestClassifier(), rf_distributions, n_candidates=10)
 
-"""### K Nearest Neighbors (with best parameters)"""
+"""### Random Forest (with best parameters)"""
 
-knn_classifier = KNeighborsClassifier(p = 2, n_neighbors = 19, leaf_size = 6)
-knn_classifier.fit(X_train, y_train)
+zoo.add_model('three_layer/rf', 'three_layer_selected', RandomForestClassifier(**best_params.get('rf', 'three_layer_selected', n_estimators=1000, min_samples_split=10, min_samples_leaf=2, max_features='sqrt', max_depth=30)))
 
-pred = knn_classifier.predict(X_test)
-print(classification_report(y_test, pred))
+"""### Gradient Boosting (with default parameters)"""
 
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+gb_classifier = GradientBoostingClassifier(n_estimators = 200)
 
-"""### Random Forest Hyper-Parameter Tuning"""
+"""### Histogram Gradient Boosting (SVD-compressed layers)
 
-rf_params = RandomizedSearchCV(estimator=RandomForestClassifier(), param_distributions={
-    "n_estimators" : [200, 400, 600, 800, 1000],
-    "max_features" : ['auto', 'sqrt'],
-    "max_depth" : [10, 20, 30, 40, 50, None],
-    "min_samples_split" : [2, 5, 10],
-    "min_samples_leaf" : [1, 2, 4]
-}, n_iter=10, n_jobs=-1)
+Every layer is compressed with TruncatedSVD to its ``svd_components`` width
+and a multi-threaded histogram booster is trained with early stopping.
+"""
 
-result = rf_params.fit(X_train, y_train)
-result_df = pd.DataFrame(result.cv_results_).loc[[result.best_index_]]
+hgb_classifier = LayerSVDBoostingClassifier(
+    selected_union.layer_sizes(),
+    n_components=[svd_components[name] for name, _, _ in selected_union.layers],
+)
 
-print(result_df["params"])
+"""## Hyper-Parameter Search
 
-"""### Random Forest (with best parameters)"""
+Runs every queued model x feature set search from one job pool, before the
+models are fitted. The best parameters are written to best_params.json and
+applied to the queued models, so this run already trains with them. A search
+in which every candidate failed (see ``errors`` in the table) is not stored;
+its model keeps the earlier stored or default parameters given above.
+"""
 
-rf_classifier = RandomForestClassifier(n_estimators = 1000, min_samples_split = 10, min_samples_leaf = 2, max_features = 'auto', max_depth = 30)
-rf_classifier.fit(X_train, y_train)
+with profiler.stage('hyper_search', searches=len(hyper_search.searches)):
+    search_results = hyper_search.run('best_params.json')
 
-pred = rf_classifier.predict(X_test)
-print(classification_report(y_test, pred))
+best_params.update(search_results)
+for name, feature_set, estimator in zoo.models:
+    estimator.set_params(**best_params.get(name.rsplit('/', 1)[-1], feature_set))
 
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+pd.DataFrame([{'search': key, 'score': search_result['score'], 'params': search_result['params'],
+               'errors': sum(len(failed) for failed in search_result['errors'].values())}
+              for key, search_result in search_results.items()])
 
-"""### Gradient Boosting (with default parameters)"""
+"""## Model Training
+
+The models queued by all four approaches are fitted together, one process
+per fit. Every worker maps the same shared copy of its training matrix.
+Models whose fit failed are listed in ``zoo.errors`` and are not evaluated.
+"""
+
+with profiler.stage('train', models=len(zoo.models)) as stage:
+    zoo.fit()
+    stage.set(fit_seconds=zoo.fit_seconds, fit_errors=zoo.errors)
+
+for name, feature_set, model in zoo.items():
+    evaluation.add_model(name, feature_set, model)
+
+"""### Boosting Models
+
+The exact and histogram boosting models of the fourth approach are fitted one
+after the other once the zoo is done, so their training times are compared
+without other fits competing for the cores.
+"""
 
-gb_classifier = GradientBoostingClassifier(verbose=True, n_estimators = 200)
-gb_classifier.fit(X_train, y_train)
+boosting_train_seconds = {}
+for key, model in [('gb', gb_classifier), ('hgb', hgb_classifier)]:
+    with profiler.stage('three_layer/' + key + '/fit') as stage:
+        stage.count(X_train_selected)
+        started = time.perf_counter()
+        model.fit(X_train_selected, y_train)
+        boosting_train_seconds[key] = time.perf_counter() - started
+    evaluation.add_model('three_layer/' + key, 'three_layer_selected', model)
 
-pred = gb_classifier.predict(X_test)
-print(classification_report(y_test, pred))
+"""## Model Bundle
+
+The evaluated vectorizers, selected columns, layer weights and classifier are saved together.
+"""
+
+labels = ['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER']
+production_classifier = hgb_classifier if boosting_mode == 'hist' else gb_classifier
+
+model_bundle = ModelBundle(selected_union, production_classifier, labels, semantic_featurizer=empath_featurizer, pos_model='en')
+with profiler.stage('bundle/save'):
+    manifest = model_bundle.save('three_layer_model', train_hash=training_hash(X_train_text_raw, y_train), compact_vectorizers=True)
+
+with profiler.stage('bundle/load'):
+    loaded_model = ModelBundle.load('three_layer_model').classifier
+evaluation.add_model('three_layer/bundle', 'three_layer_selected', loaded_model)
+
+"""# Evaluation
+
+Every model queued above is scored on its test rows in one parallel batch.
+The results table and each model's report and confusion matrix are written
+to evaluation_results.json, the confusion matrices to ``plot_dir``.
+"""
 
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
+with profiler.stage('evaluate', models=len(evaluation.models)):
+    evaluation_results = evaluation.run('evaluation_results.json')
+evaluation_results
 
-gb_classifier = GradientBoostingClassifier(verbose=True, n_estimators = 200)
-gb_classifier.fit(X_train, y_train)
+"""### Exact vs Histogram Gradient Boosting"""
 
-pickled_model = 'three_layer_pickle.sav'
-pickle.dump(gb_classifier, open(pickled_model, 'wb'))
+boosting_comparison = pd.DataFrame([
+    {'model': name, 'accuracy': evaluation.evaluations['three_layer/' + key]['accuracy'], 'train_seconds': train_time,
+     'latency_ms': per_article_latency(model, X_test_selected) * 1000}
+    for name, key, model, train_time in [('exact', 'gb', gb_classifier, boosting_train_seconds['gb']), ('hist', 'hgb', hgb_classifier, boosting_train_seconds['hgb'])]
+])
+boosting_comparison['iterations'] = [gb_classifier.n_estimators_, hgb_classifier.n_iter_]
+boosting_comparison
 
-loaded_model = pickle.load(open(pickled_model, 'rb'))
-pred = loaded_model.predict(X_test)
-print(classification_report(y_test, pred))
+"""# Run Report"""
 
-cm = metrics.confusion_matrix(y_test, pred, labels=['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER'])
-print('Confusion Matrix: ')
-print(cm)
-plot_confusion_matrix(cm, classes=['FALSE', 'TRUE', 'PARTIALLY', 'OTHER'])
\ No newline at end of file
+profiler.write('run_report.json')
+zoo.close()
\ No newline at end of file
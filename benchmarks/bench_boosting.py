@@ -0,0 +1,55 @@
+"""Exact vs histogram gradient boosting on the weighted sparse features.
+
+Trains ``GradientBoostingClassifier`` on the sparse matrix and
+``LayerSVDBoostingClassifier`` on the same matrix compressed per layer,
+on a synthetic labelled corpus, and reports accuracy, training time and
+per-article latency.
+
+    python -m benchmarks.bench_boosting --articles 2000 --components 200
+"""
+
+import argparse
+
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+
+from benchmarks.bench_cleaning import timed
+from benchmarks.bench_selection import labelled_articles
+from fake_news_detection.boosting import LayerSVDBoostingClassifier, per_article_latency
+from fake_news_detection.union import WeightedFeatureUnion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=200)
+    parser.add_argument('--estimators', type=int, default=200)
+    parser.add_argument('--components', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    texts, labels = labelled_articles(args.articles, args.words)
+    X_train_text, X_test_text, y_train, y_test = train_test_split(texts, labels, test_size=0.2, random_state=0)
+
+    words = TfidfVectorizer().fit(X_train_text)
+    bigrams = TfidfVectorizer(ngram_range=(2, 2), min_df=2).fit(X_train_text)
+    union = WeightedFeatureUnion([('words', words, 1.0), ('bigrams', bigrams, 0.5)])
+    X_train = union.transform({'words': X_train_text, 'bigrams': X_train_text})
+    X_test = union.transform({'words': X_test_text, 'bigrams': X_test_text})
+
+    classifiers = {
+        'exact': GradientBoostingClassifier(n_estimators=args.estimators),
+        'hist': LayerSVDBoostingClassifier(union.layer_sizes(), n_components=args.components),
+    }
+
+    print('articles: {}, columns: {}'.format(args.articles, X_train.shape[1]))
+    print('{:<10}{:>10}{:>12}{:>14}'.format('model', 'accuracy', 'fit (s)', 'latency (ms)'))
+    for name, classifier in classifiers.items():
+        _, fit_time = timed(classifier.fit, X_train, y_train)
+        accuracy = classifier.score(X_test, y_test)
+        latency = per_article_latency(classifier, X_test) * 1000
+        print('{:<10}{:>10.3f}{:>12.2f}{:>14.2f}'.format(name, accuracy, fit_time, latency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Before/after benchmark for the cleaning stage.
+
+Compares the original per-call ``clean_text`` from the notebook with
+``TextCleaner.clean_many`` on a synthetic corpus and checks that both
+produce the same output.
+
+    python -m benchmarks.bench_cleaning --articles 2000 --words 400
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+from fake_news_detection.cleaning import TextCleaner
+
+
+def legacy_clean_text(text):
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+
+    text = re.sub('['+string.punctuation+']', '', text)
+    text = re.sub(r"[-()\"#/@’;:<>{}`+=~|.!?,]", '', text)
+    text = text.lower().split()
+
+    stops = set(stopwords.words("english"))
+    text = [w for w in text if w not in stops]
+    text = " ".join(text)
+
+    text = re.sub(r'[^a-zA-Z\s]', u'', text, flags=re.UNICODE)
+
+    text = text.split()
+    l = WordNetLemmatizer()
+    lemmatized_words = [l.lemmatize(word) for word in text if len(word) > 2]
+    text = " ".join(lemmatized_words)
+
+    return text
+
+
+VOCABULARY = [
+    'The', 'president', 'said', 'vaccines', 'were', 'tested', 'on', 'children',
+    'claims', "didn't", 'COVID-19', 'spreading', 'cases', 'officials', 'reported',
+    'news', 'articles', '5G', 'towers', 'it’s', 'government', 'study', 'found',
+    'studies', 'doctors', 'élection', 'votes', '(2020)', '"fake"', 'posts', '@user',
+    'the\\', 'don\\t', 'and\\or', '\\n',
+]
+
+
+def synthetic_articles(n_articles, n_words, seed=42):
+    rng = random.Random(seed)
+    for _ in range(n_articles):
+        words = rng.choices(VOCABULARY, k=n_words)
+        yield ' '.join(w + rng.choice(['', '', '', ',', '.', '!']) for w in words)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=400)
+    args = parser.parse_args(argv)
+
+    articles = list(synthetic_articles(args.articles, args.words))
+
+    before, before_time = timed(lambda texts: [legacy_clean_text(t) for t in texts], articles)
+    after, after_time = timed(TextCleaner().clean_many, articles)
+
+    assert before == after, 'TextCleaner output differs from clean_text'
+
+    print('articles: {}, words per article: {}'.format(args.articles, args.words))
+    print('{:<34}{:8.3f}s'.format('clean_text (before):', before_time))
+    print('{:<34}{:8.3f}s'.format('TextCleaner.clean_many (after):', after_time))
+    print('speed-up: {:.1f}x'.format(before_time / after_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Default vs compact vectorization of the three-layer model's layers.
+
+Vectorizes the POS and text layers of a synthetic CLEF corpus with 1-3-gram
+TF-IDF, once with the notebook's float64 ``TfidfVectorizer`` and once with
+``StreamingTfidfVectorizer`` (pruned vocabulary, float32, int32 indices,
+bounded counting table), and the semantic layer with ``SemanticTfidf`` in
+float64 and float32 (its Empath counts are computed once, outside the
+timings; without Empath the suite's stand-in counts are used). It combines
+the three with the layer weights and reports the columns, the size of the
+combined training matrix, the vectorization time and the test accuracy of
+two linear models on both. ``--trace-memory``
+repeats the vectorization under tracemalloc (much slower) for its peak.
+
+    python -m benchmarks.bench_compact --articles 5000 --min-df 2 --budget-mb 64 --trace-memory
+"""
+
+import argparse
+import tracemalloc
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+
+from benchmarks.bench_cleaning import timed
+from benchmarks.corpus import synthetic_corpus
+from benchmarks.suite import MISSING_RESOURCE_ERRORS, _empath, _fallback_counts
+from fake_news_detection.compact import StreamingTfidfVectorizer
+from fake_news_detection.pipeline import LAYER_ORDER, LAYER_WEIGHTS
+from fake_news_detection.semantics import SemanticTfidf
+from fake_news_detection.union import WeightedFeatureUnion
+
+
+def matrix_mb(X):
+    return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 2 ** 20
+
+
+def models():
+    return {
+        'naive bayes': MultinomialNB(alpha=0.1),
+        'sgd': SGDClassifier(loss='log_loss', alpha=1e-5, random_state=0),
+    }
+
+
+def semantic_counts(texts):
+    """Empath category counts of ``texts`` and the category names (stand-ins without Empath)."""
+    try:
+        empath = _empath()
+        return empath.transform(texts), empath.categories
+    except MISSING_RESOURCE_ERRORS:
+        counts = _fallback_counts(texts)
+        return counts, ['category_{}'.format(j) for j in range(counts.shape[1])]
+
+
+def vectorize(make_vectorizers, dtype, train, test):
+    vectorizers = make_vectorizers()
+    train_blocks = [vectorizers[name].fit_transform(train[name]) for name in LAYER_ORDER]
+    test_blocks = [vectorizers[name].transform(test[name]) for name in LAYER_ORDER]
+    union = WeightedFeatureUnion([(name, vectorizers[name], LAYER_WEIGHTS[name]) for name in LAYER_ORDER],
+                                 dtype=dtype)
+    return union.combine(train_blocks), union.combine(test_blocks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=3000)
+    parser.add_argument('--words', type=int, default=400)
+    parser.add_argument('--min-df', type=int, default=2)
+    parser.add_argument('--budget-mb', type=float, default=256)
+    parser.add_argument('--trace-memory', action='store_true')
+    args = parser.parse_args(argv)
+
+    data = synthetic_corpus(args.articles, args.words)
+    train_rows, test_rows = train_test_split(np.arange(len(data)), test_size=0.2, random_state=42)
+    layers = {'text': data['text'].tolist(), 'pos': data['POS_text'].tolist()}
+    train = {name: [layer[i] for i in train_rows] for name, layer in layers.items()}
+    test = {name: [layer[i] for i in test_rows] for name, layer in layers.items()}
+    counts, categories = semantic_counts((data['title'] + ' ' + data['text']).tolist())
+    train['sem'], test['sem'] = counts[train_rows], counts[test_rows]
+    labels = data['our rating'].astype('str').to_numpy()
+    y_train, y_test = labels[train_rows], labels[test_rows]
+
+    modes = {
+        'default': (lambda: {
+            'pos': TfidfVectorizer(stop_words='english', ngram_range=(1, 3)),
+            'text': TfidfVectorizer(stop_words='english', ngram_range=(1, 3)),
+            'sem': SemanticTfidf(categories, stop_words='english'),
+        }, np.float64),
+        'compact': (lambda: {
+            'pos': StreamingTfidfVectorizer((1, 3), stop_words='english', min_df=args.min_df,
+                                            memory_budget_mb=args.budget_mb),
+            'text': StreamingTfidfVectorizer((1, 3), stop_words='english', min_df=args.min_df,
+                                             memory_budget_mb=args.budget_mb),
+            'sem': SemanticTfidf(categories, stop_words='english', dtype=np.float32),
+        }, np.float32),
+    }
+
+    print('articles: {}, words: {}, min_df: {}, budget: {} MB'.format(
+        args.articles, args.words, args.min_df, args.budget_mb))
+    print('{:<10}{:>10}{:>12}{:>12}{:>10}  {}'.format('mode', 'columns', 'matrix (MB)', 'peak (MB)',
+                                                      'fit (s)', 'accuracy'))
+
+    baseline = {}
+    for mode, (make_vectorizers, dtype) in modes.items():
+        (X_train, X_test), fit_time = timed(vectorize, make_vectorizers, dtype, train, test)
+        peak = float('nan')
+        if args.trace_memory:
+            tracemalloc.start()
+            vectorize(make_vectorizers, dtype, train, test)
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+
+        scores = []
+        for name, model in models().items():
+            accuracy = model.fit(X_train, y_train).score(X_test, y_test)
+            change = accuracy - baseline.setdefault(name, accuracy)
+            scores.append('{} {:.3f} ({:+.3f})'.format(name, accuracy, change))
+
+        print('{:<10}{:>10}{:>12.2f}{:>12.1f}{:>10.2f}  {}'.format(
+            mode, X_train.shape[1], matrix_mb(X_train), peak, fit_time, ', '.join(scores)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Full-width vs selected matrices for the tree models.
+
+Trains the random forest and gradient boosting models on the shared
+synthetic CLEF corpus (``benchmarks.corpus``) vectorized with 1-3-gram TF-IDF, once on every column and
+once after ``LayerSelector``, and reports training time, pickled model
+size and test accuracy.
+
+    python -m benchmarks.bench_selection --articles 2000 --k 2000 --method chi2
+"""
+
+import argparse
+import pickle
+
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+
+from benchmarks.bench_cleaning import timed
+from benchmarks.corpus import synthetic_corpus
+from fake_news_detection.selection import LayerSelector
+from fake_news_detection.union import WeightedFeatureUnion
+
+
+def models():
+    return {
+        'random forest': RandomForestClassifier(n_estimators=200, max_depth=30, n_jobs=-1, random_state=0),
+        'gradient boosting': GradientBoostingClassifier(n_estimators=50, random_state=0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=200)
+    parser.add_argument('--k', type=int, default=2000)
+    parser.add_argument('--method', default='chi2', choices=['chi2', 'mutual_info', 'df'])
+    args = parser.parse_args(argv)
+
+    corpus = synthetic_corpus(args.articles, args.words)
+    texts = (corpus['title'] + ' ' + corpus['text']).tolist()
+    labels = corpus['our rating'].tolist()
+    X_train_text, X_test_text, y_train, y_test = train_test_split(texts, labels, test_size=0.2, random_state=0)
+
+    vectorizer = TfidfVectorizer(ngram_range=(1, 3))
+    train_block = vectorizer.fit_transform(X_train_text)
+    test_block = vectorizer.transform(X_test_text)
+    union = WeightedFeatureUnion([('text', vectorizer, 1.0)])
+
+    selector = LayerSelector({'text': args.k}, method=args.method)
+    (selected_union, selected_train), selection_time = timed(selector.fit, union, [train_block], y_train)
+
+    matrices = {
+        'full': (union.combine([train_block]), union.combine([test_block])),
+        'selected': (selected_union.combine(selected_train),
+                     selected_union.combine(selector.transform(union, [test_block]))),
+    }
+
+    print('articles: {}, columns: {} -> {} ({}, {:.2f}s)'.format(
+        args.articles, matrices['full'][0].shape[1], matrices['selected'][0].shape[1],
+        args.method, selection_time))
+    print('{:<20}{:<10}{:>10}{:>12}{:>10}'.format('model', 'matrix', 'fit (s)', 'size (MB)', 'accuracy'))
+
+    for name in models():
+        for matrix, (X_train, X_test) in matrices.items():
+            model = models()[name]
+            _, fit_time = timed(model.fit, X_train, y_train)
+            size = len(pickle.dumps(model)) / 2 ** 20
+            accuracy = model.score(X_test, y_test)
+            print('{:<20}{:<10}{:>10.2f}{:>12.2f}{:>10.3f}'.format(name, matrix, fit_time, size, accuracy))
+
+
+if __name__ == '__main__':
+    main()
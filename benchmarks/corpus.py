@@ -0,0 +1,137 @@
+"""Synthetic CLEF-style corpus generator.
+
+Generates labelled articles with the same columns as ``data.tsv`` and
+``data2.tsv`` (``public_id``, ``title``, ``text``, ``our rating``). Every
+label mixes a shared vocabulary with a few label-specific words, so the
+classifiers have something to learn, and every word has a fixed coarse POS
+tag so the ``POS_text`` layer can be produced without spaCy. A long tail
+of rare made-up nouns gives the n-gram vectorizers a realistic width.
+
+    python -m benchmarks.corpus --articles 5000 --words 400 --output data.tsv
+"""
+
+import argparse
+import random
+
+import pandas as pd
+
+LABELS = ['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER']
+
+STOP_WORDS = [
+    ('the', 'DET'), ('a', 'DET'), ('of', 'ADP'), ('to', 'PART'), ('and', 'CCONJ'), ('in', 'ADP'),
+    ('that', 'SCONJ'), ('it', 'PRON'), ('was', 'AUX'), ('for', 'ADP'), ('on', 'ADP'), ('are', 'AUX'),
+    ('with', 'ADP'), ('they', 'PRON'), ('be', 'AUX'), ('at', 'ADP'), ('this', 'DET'), ('have', 'AUX'),
+]
+
+SHARED_WORDS = [
+    ('president', 'NOUN'), ('government', 'NOUN'), ('vaccine', 'NOUN'), ('election', 'NOUN'),
+    ('people', 'NOUN'), ('study', 'NOUN'), ('doctors', 'NOUN'), ('officials', 'NOUN'), ('video', 'NOUN'),
+    ('report', 'NOUN'), ('country', 'NOUN'), ('children', 'NOUN'), ('virus', 'NOUN'), ('money', 'NOUN'),
+    ('said', 'VERB'), ('claimed', 'VERB'), ('shows', 'VERB'), ('found', 'VERB'), ('posted', 'VERB'),
+    ('reported', 'VERB'), ('spread', 'VERB'), ('announced', 'VERB'), ('tested', 'VERB'),
+    ('new', 'ADJ'), ('public', 'ADJ'), ('national', 'ADJ'), ('global', 'ADJ'), ('social', 'ADJ'),
+    ('recently', 'ADV'), ('never', 'ADV'), ('already', 'ADV'), ('Washington', 'PROPN'), ('Facebook', 'PROPN'),
+    ('2020', 'NUM'), ('million', 'NUM'),
+]
+
+LABEL_WORDS = {
+    'FALSE': [('hoax', 'NOUN'), ('secretly', 'ADV'), ('microchips', 'NOUN'), ('cover-up', 'NOUN'),
+              ('banned', 'VERB'), ('shocking', 'ADJ'), ('5G', 'PROPN'), ('exposed', 'VERB')],
+    'TRUE': [('according', 'VERB'), ('data', 'NOUN'), ('confirmed', 'VERB'), ('percent', 'NOUN'),
+             ('agency', 'NOUN'), ('statement', 'NOUN'), ('official', 'ADJ'), ('researchers', 'NOUN')],
+    'PARTIALLY FALSE': [('misleading', 'ADJ'), ('context', 'NOUN'), ('however', 'ADV'), ('partly', 'ADV'),
+                        ('exaggerated', 'VERB'), ('older', 'ADJ'), ('although', 'SCONJ'), ('figure', 'NOUN')],
+    'OTHER': [('satire', 'NOUN'), ('opinion', 'NOUN'), ('joke', 'NOUN'), ('column', 'NOUN'),
+              ('believe', 'VERB'), ('funny', 'ADJ'), ('parody', 'NOUN'), ('perhaps', 'ADV')],
+}
+
+SYLLABLES = ['ren', 'lo', 'mi', 'ka', 'tas', 'vo', 'bri', 'del', 'sun', 'pa', 'or', 'ex', 'qui', 'zan', 'tel']
+
+
+def rare_words(n_words):
+    """``n_words`` distinct made-up nouns, shortest first."""
+    words = []
+    length = 2
+    while len(words) < n_words:
+        for i in range(len(SYLLABLES) ** length):
+            word = ''.join(SYLLABLES[i // len(SYLLABLES) ** k % len(SYLLABLES)] for k in range(length))
+            words.append(word)
+            if len(words) == n_words:
+                break
+        length += 1
+    return words
+
+
+def _sentence(rng, words, label_words, label_share, rare, n_words, pos_tags, rare_share=0.2):
+    tokens, tags = [], []
+    for word, tag in rng.choices(words, k=n_words):
+        draw = rng.random()
+        if draw < label_share:
+            word, tag = rng.choice(label_words)
+        elif rare and draw < label_share + rare_share:
+            # Zipf-like: a few rare words are common, most appear once or twice
+            word, tag = rare[min(int(rng.paretovariate(0.7)) - 1, len(rare) - 1)], 'NOUN'
+        tokens.append(word)
+        tags.append(tag)
+    tokens[0] = tokens[0].capitalize()
+    tokens[-1] += rng.choice(['.', '.', '.', '!', '?'])
+    if len(tokens) > 4:
+        tokens[len(tokens) // 2] += ','
+        tags.insert(len(tags) // 2 + 1, 'PUNCT')
+    pos_tags.extend(tags + ['PUNCT'])
+    return ' '.join(tokens)
+
+
+def _article(rng, label, n_words, label_share, rare):
+    pos_tags = []
+    sentences = []
+    remaining = n_words
+    while remaining > 0:
+        length = min(remaining, rng.randint(6, 20))
+        sentences.append(_sentence(rng, STOP_WORDS * 2 + SHARED_WORDS, LABEL_WORDS[label], label_share, rare,
+                                   length, pos_tags))
+        remaining -= length
+    return ' '.join(sentences), ' '.join(pos_tags)
+
+
+def synthetic_corpus(n_articles=1000, n_words=400, label_share=0.005, n_rare_words=50000, seed=42):
+    """A DataFrame of ``n_articles`` labelled articles of about ``n_words`` words.
+
+    ``label_share`` is the fraction of words drawn from the label's own
+    vocabulary and so controls how easy the labels are to separate. Besides the CLEF columns the frame
+    has the ``POS_text`` of ``title + ' ' + text``.
+    """
+    rng = random.Random(seed)
+    rare = rare_words(n_rare_words)
+    rows = []
+    for _ in range(n_articles):
+        label = rng.choice(LABELS)
+        title, title_tags = _article(rng, label, rng.randint(6, 14), label_share, rare)
+        text, text_tags = _article(rng, label, max(1, int(rng.gauss(n_words, n_words / 4))), label_share, rare)
+        rows.append({
+            'public_id': '{:016x}'.format(rng.getrandbits(64)),
+            'title': title,
+            'text': text,
+            'our rating': label,
+            'POS_text': title_tags + ' ' + text_tags,
+        })
+    return pd.DataFrame(rows)
+
+
+def write_tsv(corpus, path):
+    corpus.drop(columns=['POS_text']).to_csv(path, sep='\t', index=False, encoding='mac_roman')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=1000)
+    parser.add_argument('--words', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='data.tsv')
+    args = parser.parse_args(argv)
+
+    write_tsv(synthetic_corpus(args.articles, args.words, seed=args.seed), args.output)
+
+
+if __name__ == '__main__':
+    main()
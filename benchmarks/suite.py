@@ -0,0 +1,263 @@
+"""Stage-level benchmark suite for the three-layer pipeline.
+
+Runs every stage of ``Fake_News_Detection.py`` on a synthetic corpus
+(``benchmarks.corpus``) and records wall time, CPU time and peak traced
+memory per stage: cleaning, POS tagging, Empath counts, the three
+vectorizers, the weighted union and fit/predict of every classifier.
+Stages whose optional resources are missing (spaCy model, NLTK corpora,
+Empath) are marked as skipped and the generator's stand-in layer is used.
+
+    python -m benchmarks.suite run --articles 2000 --words 400 --output bench.json
+    python -m benchmarks.suite compare baseline.json bench.json --tolerance 0.1
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+
+from benchmarks.corpus import synthetic_corpus
+from fake_news_detection.boosting import LayerSVDBoostingClassifier
+from fake_news_detection.neighbors import SparseCosineKNN
+from fake_news_detection.profiling import peak_rss_mb
+from fake_news_detection.union import WeightedFeatureUnion
+
+MISSING_RESOURCE_ERRORS = (ImportError, LookupError, OSError)
+
+CLASSIFIERS = {
+    'nb': lambda union: MultinomialNB(alpha=0.1),
+    'knn': lambda union: SparseCosineKNN(n_neighbors=19, metric='euclidean'),
+    'rf': lambda union: RandomForestClassifier(n_estimators=1000, min_samples_split=10, min_samples_leaf=2,
+                                               max_depth=30, n_jobs=-1),
+    'gb': lambda union: GradientBoostingClassifier(n_estimators=200),
+    'hgb': lambda union: LayerSVDBoostingClassifier(union.layer_sizes(), n_components=[100, 300, 100]),
+}
+
+
+class StageTimer:
+    """Measures named stages and keeps their results in ``self.stages``."""
+
+    def __init__(self, repeat=1):
+        self.repeat = repeat
+        self.stages = {}
+
+    def run(self, name, function, *args, fallback=None):
+        """Run ``function(*args)`` ``repeat`` times and record the fastest run.
+
+        When the stage needs a resource that is not installed, the stage is
+        recorded as skipped and ``fallback`` is returned instead.
+        """
+        timings = []
+        result = None
+        for _ in range(self.repeat):
+            gc.collect()
+            tracemalloc.start()
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                result = function(*args)
+            except MISSING_RESOURCE_ERRORS as error:
+                tracemalloc.stop()
+                # NLTK's messages start with a banner of asterisks
+                message = next((line.strip() for line in str(error).splitlines() if line.strip(' *')), '')
+                self.stages[name] = {'skipped': '{}: {}'.format(type(error).__name__, message)}
+                return fallback
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            timings.append((wall, cpu, peak))
+
+        wall, cpu, _ = min(timings)
+        self.stages[name] = {
+            'seconds': wall,
+            'cpu_seconds': cpu,
+            'peak_mb': max(peak for _, _, peak in timings) / 2 ** 20,
+            'rss_mb': peak_rss_mb(),
+        }
+        if hasattr(result, 'shape'):
+            self.stages[name]['shape'] = list(result.shape)
+        return result
+
+
+def _clean(texts):
+    from fake_news_detection.cleaning import TextCleaner
+    return TextCleaner().clean_many(texts)
+
+
+def _tag(texts):
+    from fake_news_detection.pos import POSTagger
+    return POSTagger().tag_many(texts)
+
+
+def _empath():
+    from fake_news_detection.semantics import EmpathFeaturizer
+    return EmpathFeaturizer()
+
+
+def _fallback_counts(texts):
+    # Stand-in for the Empath counts: word counts over a fixed category-sized vocabulary
+    from sklearn.feature_extraction.text import CountVectorizer
+    return CountVectorizer(max_features=194).fit_transform(texts)
+
+
+def run_suite(n_articles, n_words, classifiers, repeat=1, seed=42):
+    from fake_news_detection.semantics import SemanticTfidf
+
+    corpus = synthetic_corpus(n_articles, n_words, seed=seed)
+    texts = (corpus['title'] + ' ' + corpus['text']).tolist()
+    labels = corpus['our rating'].to_numpy()
+    timer = StageTimer(repeat)
+
+    clean = timer.run('clean_text', _clean, texts, fallback=[text.lower() for text in texts])
+    pos = timer.run('pos_tagging', _tag, texts, fallback=corpus['POS_text'].tolist())
+    empath = timer.run('empath_load', _empath)
+    if empath is not None:
+        counts = timer.run('empath', empath.transform, texts)
+        categories = empath.categories
+    else:
+        counts = _fallback_counts(texts)
+        categories = ['category_{}'.format(j) for j in range(counts.shape[1])]
+
+    train, test = train_test_split(np.arange(n_articles), test_size=0.2, random_state=0)
+    layers = [
+        ('pos', TfidfVectorizer(stop_words='english', ngram_range=(1, 3)), [pos[i] for i in train],
+         [pos[i] for i in test]),
+        ('text', TfidfVectorizer(stop_words='english', ngram_range=(1, 3)), [clean[i] for i in train],
+         [clean[i] for i in test]),
+        ('sem', SemanticTfidf(categories, stop_words='english'), counts[train], counts[test]),
+    ]
+
+    train_blocks, test_blocks = [], []
+    for name, vectorizer, train_input, test_input in layers:
+        train_blocks.append(timer.run('vectorize_fit/{}'.format(name), vectorizer.fit_transform, train_input))
+        test_blocks.append(timer.run('vectorize/{}'.format(name), vectorizer.transform, test_input))
+
+    union = WeightedFeatureUnion([(name, vectorizer, weight) for (name, vectorizer, _, _), weight
+                                  in zip(layers, [0.15 * 3, 0.5 * 3, 0.35 * 3])])
+    X_train = timer.run('union/train', union.combine, train_blocks)
+    X_test = timer.run('union/test', union.combine, test_blocks)
+
+    accuracy = {}
+    for name in classifiers:
+        classifier = CLASSIFIERS[name](union)
+        timer.run('fit/{}'.format(name), classifier.fit, X_train, labels[train])
+        predictions = timer.run('predict/{}'.format(name), classifier.predict, X_test)
+        accuracy[name] = float(np.mean(predictions == labels[test]))
+
+    return {
+        'config': {'articles': n_articles, 'words': n_words, 'classifiers': list(classifiers),
+                   'repeat': repeat, 'seed': seed},
+        'environment': environment(),
+        'stages': timer.stages,
+        'accuracy': accuracy,
+    }
+
+
+def environment():
+    import sklearn
+    import scipy
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def compare(baseline, current, tolerance=0.1, min_seconds=0.05):
+    """Rows of ``(stage, metric, before, after, change, regressed)`` for stages in both runs.
+
+    A stage regresses when its time or peak memory grows, or a classifier's
+    accuracy drops, by more than ``tolerance`` (a fraction); stages faster
+    than ``min_seconds`` in both runs are too noisy to flag on time.
+    """
+    rows = []
+    for stage, before in baseline['stages'].items():
+        after = current['stages'].get(stage)
+        if after is None or 'skipped' in before or 'skipped' in after:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            change = (after[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            noisy = metric == 'seconds' and max(before[metric], after[metric]) < min_seconds
+            rows.append((stage, metric, before[metric], after[metric], change,
+                         change > tolerance and not noisy))
+
+    for name, before in baseline.get('accuracy', {}).items():
+        after = current.get('accuracy', {}).get(name)
+        if after is not None:
+            change = (after - before) / before if before else 0.0
+            rows.append(('accuracy/{}'.format(name), 'accuracy', before, after, change, -change > tolerance))
+    return rows
+
+
+def print_stages(report):
+    print('{:<24}{:>10}{:>10}{:>12}  {}'.format('stage', 'wall (s)', 'cpu (s)', 'peak (MB)', 'shape'))
+    for stage, result in report['stages'].items():
+        if 'skipped' in result:
+            print('{:<24}skipped ({})'.format(stage, result['skipped']))
+        else:
+            print('{:<24}{:>10.3f}{:>10.3f}{:>12.1f}  {}'.format(
+                stage, result['seconds'], result['cpu_seconds'], result['peak_mb'], result.get('shape', '')))
+    for name, accuracy in report['accuracy'].items():
+        print('accuracy/{:<15}{:>10.3f}'.format(name, accuracy))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='benchmark every stage on a synthetic corpus')
+    run.add_argument('--articles', type=int, default=2000)
+    run.add_argument('--words', type=int, default=400)
+    run.add_argument('--classifiers', nargs='+', default=list(CLASSIFIERS), choices=list(CLASSIFIERS))
+    run.add_argument('--repeat', type=int, default=1)
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--output', default='bench.json')
+
+    diff = commands.add_parser('compare', help='flag regressions between two runs')
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    diff.add_argument('--tolerance', type=float, default=0.1)
+    diff.add_argument('--min-seconds', type=float, default=0.05)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_suite(args.articles, args.words, args.classifiers, args.repeat, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print_stages(report)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    if baseline['config'] != current['config']:
+        print('warning: the runs used different configurations')
+
+    rows = compare(baseline, current, args.tolerance, args.min_seconds)
+    print('{:<24}{:<10}{:>12}{:>12}{:>10}'.format('stage', 'metric', 'before', 'after', 'change'))
+    for stage, metric, before, after, change, regressed in rows:
+        print('{:<24}{:<10}{:>12.3f}{:>12.3f}{:>+9.1%}{}'.format(
+            stage, metric, before, after, change, '  REGRESSION' if regressed else ''))
+
+    regressions = sum(row[-1] for row in rows)
+    print('{} regression(s)'.format(regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
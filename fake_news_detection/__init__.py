@@ -0,0 +1 @@
+"""Reusable building blocks of the three-layer fake news detection pipeline."""
@@ -0,0 +1,3 @@
+from fake_news_detection.cli import main
+
+main()
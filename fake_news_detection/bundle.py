@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import warnings
+import datetime
+
+import numpy as np
+import scipy
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from fake_news_detection.compact import CompactTfidfVectorizer, StreamingTfidfVectorizer
+from fake_news_detection.selection import SelectedVectorizer
+from fake_news_detection.union import WeightedFeatureUnion
+
+
+FORMAT_VERSION = 1
+MODEL_FILE = 'model.sav'
+MANIFEST_FILE = 'manifest.json'
+VECTORIZER_DIRECTORY = 'vectorizers'
+
+
+def training_hash(texts, labels, previous=None):
+    """Fingerprint of the training articles and their labels.
+
+    ``previous`` chains the fingerprint of a model updated with a new batch
+    to the one it was updated from.
+    """
+    digest = hashlib.sha256()
+    if previous:
+        digest.update(previous.encode('ascii'))
+    for text, label in zip(texts, labels):
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(str(label).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def library_versions():
+    return {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelBundle:
+    """Everything needed to score raw articles with the three-layer model.
+
+    Holds the fitted ``WeightedFeatureUnion`` (vectorizers and layer
+    weights), the classifier, the label set and the Empath featurizer the
+    semantic layer was built with. ``save`` writes them as one pickle next
+    to a JSON manifest describing the artifact.
+    """
+
+    def __init__(self, union, classifier, labels, semantic_featurizer=None,
+                 pos_model='en', manifest=None):
+        self.union = union
+        self.classifier = classifier
+        self.labels = list(labels)
+        self.semantic_featurizer = semantic_featurizer
+        self.pos_model = pos_model
+        self.manifest = manifest
+
+    def _compact_union(self, directory):
+        layers = []
+        for name, vectorizer, weight in self.union.layers:
+            selected = isinstance(vectorizer, SelectedVectorizer)
+            inner = vectorizer.vectorizer if selected else vectorizer
+            if isinstance(inner, StreamingTfidfVectorizer):
+                inner = inner.vectorizer_
+
+            if isinstance(inner, TfidfVectorizer):
+                inner = CompactTfidfVectorizer.from_vectorizer(inner)
+                inner.directory = os.path.join(VECTORIZER_DIRECTORY, name)
+                inner.save(os.path.join(directory, inner.directory))
+                vectorizer = SelectedVectorizer(inner, vectorizer.columns) if selected else inner
+
+            layers.append((name, vectorizer, weight))
+        return WeightedFeatureUnion(layers, self.union.dtype, self.union.chunk_rows)
+
+    def build_manifest(self, train_hash=None):
+        layers = []
+        for (name, vectorizer, weight), size in zip(self.union.layers, self.union.layer_sizes()):
+            layers.append({
+                'name': name,
+                'weight': weight,
+                'vectorizer': type(vectorizer).__name__,
+                'n_features': size,
+            })
+
+        return {
+            'format_version': FORMAT_VERSION,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'versions': library_versions(),
+            'classifier': type(self.classifier).__name__,
+            'labels': self.labels,
+            'pos_model': self.pos_model,
+            'layers': layers,
+            'n_features': sum(layer['n_features'] for layer in layers),
+            'training_hash': train_hash,
+        }
+
+    def save(self, directory, train_hash=None, compact_vectorizers=False):
+        """Write the bundle to ``directory``.
+
+        With ``compact_vectorizers`` the TF-IDF vocabularies are exported as
+        memory-mapped hash/idf arrays (see ``CompactTfidfVectorizer``)
+        instead of being pickled.
+        """
+        os.makedirs(directory, exist_ok=True)
+        model_path = os.path.join(directory, MODEL_FILE)
+        union = self._compact_union(directory) if compact_vectorizers else self.union
+
+        with open(model_path, 'wb') as f:
+            pickle.dump({
+                'union': union,
+                'classifier': self.classifier,
+                'labels': self.labels,
+                'semantic_featurizer': self.semantic_featurizer,
+                'pos_model': self.pos_model,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.manifest = self.build_manifest(train_hash)
+        self.manifest['compact_vectorizers'] = compact_vectorizers
+        self.manifest['model_sha256'] = _file_sha256(model_path)
+
+        with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+
+        return self.manifest
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError('Unsupported bundle format: {}'.format(manifest.get('format_version')))
+
+        model_path = os.path.join(directory, MODEL_FILE)
+        if _file_sha256(model_path) != manifest['model_sha256']:
+            raise ValueError('{} does not match its manifest'.format(model_path))
+
+        trained_with = manifest['versions']['sklearn']
+        if trained_with != sklearn.__version__:
+            warnings.warn('Bundle was trained with scikit-learn {}, running {}'.format(
+                trained_with, sklearn.__version__))
+
+        with open(model_path, 'rb') as f:
+            parts = pickle.load(f)
+
+        for _, vectorizer, _ in parts['union'].layers:
+            if isinstance(vectorizer, SelectedVectorizer):
+                vectorizer = vectorizer.vectorizer
+            if isinstance(vectorizer, CompactTfidfVectorizer):
+                vectorizer.attach(directory)
+
+        return cls(manifest=manifest, **parts)
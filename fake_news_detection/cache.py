@@ -0,0 +1,122 @@
+import os
+import uuid
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def text_key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class FeatureCache:
+    """Content addressed Parquet cache for the derived text layers.
+
+    Every stage (``clean_text``, ``POS_text``, the Empath counts, ...) gets
+    its own directory named after the stage and a version tag, holding
+    append-only Parquet parts keyed by a hash of the article text. Bump the
+    version tag whenever the code or model behind a stage changes. Only the
+    articles missing from the cache are passed to ``compute``.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _stage_path(self, stage, version):
+        return os.path.join(self.directory, '{}-{}'.format(stage, version))
+
+    def _load(self, stage, version):
+        import pyarrow.parquet as pq
+
+        path = self._stage_path(stage, version)
+        if not os.path.isdir(path) or not os.listdir(path):
+            return None
+        return pq.read_table(path)
+
+    def _append(self, stage, version, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._stage_path(stage, version)
+        os.makedirs(path, exist_ok=True)
+        part = os.path.join(path, 'part-{}.parquet'.format(uuid.uuid4().hex))
+        pq.write_table(pa.table(columns), part)
+
+    def _lookup(self, stage, version, texts):
+        keys = [text_key(text) for text in texts]
+        table = self._load(stage, version)
+
+        index = {}
+        if table is not None:
+            index = {key: i for i, key in enumerate(table.column('key').to_pylist())}
+
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in index and key not in missing:
+                missing[key] = text
+
+        return keys, table, index, missing
+
+    def text_layer(self, stage, version, texts, compute):
+        """Return one string per text, computing ``compute(texts)`` only for new texts."""
+        texts = list(texts)
+        keys, table, index, missing = self._lookup(stage, version, texts)
+
+        computed = {}
+        if missing:
+            computed = dict(zip(missing, compute(list(missing.values()))))
+            self._append(stage, version, {'key': list(computed), 'value': list(computed.values())})
+
+        hits = [index[key] for key in keys if key not in computed]
+        cached = iter(table.column('value').take(hits).to_pylist() if hits else [])
+
+        return [computed[key] if key in computed else next(cached) for key in keys]
+
+    def sparse_layer(self, stage, version, texts, compute, n_features):
+        """Return a CSR matrix with one row per text, computing only new rows.
+
+        ``compute`` takes a list of texts and returns a sparse matrix with
+        ``n_features`` columns.
+        """
+        import pyarrow as pa
+
+        texts = list(texts)
+        keys, table, index, missing = self._lookup(stage, version, texts)
+
+        computed = {}
+        if missing:
+            rows = sp.csr_matrix(compute(list(missing.values())), dtype=np.float32)
+            offsets = pa.array(rows.indptr.astype(np.int32))
+            self._append(stage, version, {
+                'key': list(missing),
+                'indices': pa.ListArray.from_arrays(offsets, pa.array(rows.indices.astype(np.int32))),
+                'data': pa.ListArray.from_arrays(offsets, pa.array(rows.data)),
+            })
+            computed = {key: i for i, key in enumerate(missing)}
+        else:
+            rows = sp.csr_matrix((0, n_features), dtype=np.float32)
+
+        hits = [index[key] for key in keys if key not in computed]
+        if hits:
+            indices = table.column('indices').take(hits).combine_chunks()
+            data = table.column('data').take(hits).combine_chunks()
+            offsets = indices.offsets.to_numpy()
+            cached = sp.csr_matrix(
+                (data.flatten().to_numpy(), indices.flatten().to_numpy(), offsets - offsets[0]),
+                shape=(len(hits), n_features),
+            )
+        else:
+            cached = sp.csr_matrix((0, n_features), dtype=np.float32)
+
+        # Cached rows come first in the stacked matrix, computed rows after them
+        order = np.empty(len(keys), dtype=np.intp)
+        n_cached = 0
+        for i, key in enumerate(keys):
+            if key in computed:
+                order[i] = len(hits) + computed[key]
+            else:
+                order[i] = n_cached
+                n_cached += 1
+
+        return sp.vstack([cached, rows], format='csr')[order]
@@ -0,0 +1,104 @@
+import os
+import re
+import string
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+
+# In the notebook's '[' + string.punctuation + ']' class the backslash only escapes
+# the closing bracket, so backslashes were never removed and are kept here too
+PUNCTUATION = re.compile('[' + re.escape(string.punctuation.replace('\\', '') + '’') + ']')
+NON_ALPHA = re.compile(r'[^a-zA-Z\s]', flags=re.UNICODE)
+
+
+class TextCleaner:
+    """Reusable version of the notebook's cleaning function.
+
+    Stopwords and the lemmatizer are loaded once per instance, the regex
+    passes are precompiled and lemmas are memoized in a bounded LRU cache.
+    The output is identical to the original ``clean_text``.
+    """
+
+    def __init__(self, stop_words=None, lemmatizer=None, lemma_cache_size=2 ** 16):
+        if stop_words is None:
+            from nltk.corpus import stopwords
+            stop_words = stopwords.words('english')
+        if lemmatizer is None:
+            from nltk.stem import WordNetLemmatizer
+            lemmatizer = WordNetLemmatizer()
+
+        self.stop_words = frozenset(stop_words)
+        self.lemmatizer = lemmatizer
+        self.lemmatize = lru_cache(maxsize=lemma_cache_size)(lemmatizer.lemmatize)
+
+    def clean(self, text):
+        stops = self.stop_words
+        lemmatize = self.lemmatize
+
+        text = PUNCTUATION.sub('', text).lower()
+        text = ' '.join([w for w in text.split() if w not in stops])
+        text = NON_ALPHA.sub('', text)
+
+        return ' '.join([lemmatize(w) for w in text.split() if len(w) > 2])
+
+    __call__ = clean
+
+    def clean_many(self, texts):
+        return [self.clean(text) for text in texts]
+
+
+_default_cleaner = None
+
+
+def get_cleaner():
+    global _default_cleaner
+    if _default_cleaner is None:
+        _default_cleaner = TextCleaner()
+    return _default_cleaner
+
+
+def clean_text(text):
+    return get_cleaner().clean(text)
+
+
+_worker_cleaner = None
+
+
+def _init_worker(cleaner_kwargs):
+    global _worker_cleaner
+    _worker_cleaner = TextCleaner(**cleaner_kwargs)
+
+
+def _clean_chunk(chunk):
+    return _worker_cleaner.clean_many(chunk)
+
+
+def _chunks(texts, chunk_size):
+    texts = iter(texts)
+    chunk = list(islice(texts, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(texts, chunk_size))
+
+
+def clean_parallel(texts, n_jobs=-1, chunk_size=500, **cleaner_kwargs):
+    """Clean ``texts`` across a process pool, keeping the original order.
+
+    Every worker builds its own ``TextCleaner`` (and so loads the NLTK
+    resources) once, then cleans chunks of ``chunk_size`` articles.
+    ``n_jobs=-1`` uses all cores, ``n_jobs=1`` cleans in-process.
+    """
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs == 1:
+        return TextCleaner(**cleaner_kwargs).clean_many(texts)
+
+    cleaned = []
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(cleaner_kwargs,)) as executor:
+        for chunk in executor.map(_clean_chunk, _chunks(texts, chunk_size)):
+            cleaned.extend(chunk)
+
+    return cleaned
@@ -0,0 +1,250 @@
+"""Command line interface for the three-layer fake news model.
+
+    python -m fake_news_detection train --data data.tsv --data data2.tsv:false --model three_layer_model
+    python -m fake_news_detection train --data data.tsv --online sgd --model online_model
+    python -m fake_news_detection update --model online_model --data todays_fact_checks.tsv
+    python -m fake_news_detection evaluate --model three_layer_model --data holdout.tsv
+    python -m fake_news_detection predict --model three_layer_model "Article title and text" ...
+    python -m fake_news_detection serve --model three_layer_model --port 8000
+
+Every command imports only what it needs: ``predict`` and ``serve`` skip
+matplotlib and the training code. Unpickling the model still imports
+scikit-learn, and with it pandas, so their startup takes a couple of
+seconds.
+"""
+
+import sys
+import json
+import argparse
+
+
+def _source(value):
+    """``path`` or ``path:label,label`` (raw labels to leave out of that file)."""
+    path, _, excluded = value.partition(':')
+    return path, tuple(label for label in excluded.split(',') if label)
+
+
+def _layer_k(values):
+    layer_k = {}
+    for value in values or ():
+        name, _, k = value.partition('=')
+        layer_k[name] = int(k) if k and k != 'all' else None
+    return layer_k
+
+
+def _write_json(value, path):
+    if path in (None, '-'):
+        json.dump(value, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(path, 'w') as f:
+            json.dump(value, f, indent=2)
+
+
+def _load(args):
+    from fake_news_detection.ingest import load_dataset
+    return load_dataset(args.data, cache_path=args.cache_path)
+
+
+def _dedup(data, args, profiler):
+    if args.dedup_threshold is None:
+        return data
+    from fake_news_detection.dedup import drop_near_duplicates, summarize
+    from fake_news_detection.pipeline import article_texts
+
+    with profiler.stage('dedup') as stage:
+        n_articles = len(data)
+        data, report = drop_near_duplicates(data, article_texts(data), threshold=args.dedup_threshold)
+        stage.count(data)
+        stage.set(**summarize(report, n_articles))
+    if args.dedup_report:
+        report.to_csv(args.dedup_report, index=False)
+    return data
+
+
+def _layer_kwargs(args):
+    from fake_news_detection.cache import FeatureCache
+
+    return {
+        'feature_cache': FeatureCache(args.feature_cache) if args.feature_cache else None,
+        'cleaning_jobs': args.jobs,
+    }
+
+
+def train(args):
+    from fake_news_detection.pipeline import train_model, train_online_model
+    from fake_news_detection.profiling import StageProfiler
+    from fake_news_detection.resources import ensure_nltk_resources
+
+    ensure_nltk_resources()
+    profiler = StageProfiler(enabled=args.profile is not None, profile_dir=args.profile_dir)
+
+    with profiler.stage('load_dataset') as stage:
+        data = stage.count(_load(args))
+    data = _dedup(data, args, profiler)
+
+    if args.online:
+        bundle, evaluation, train_hash = train_online_model(
+            data,
+            classifier=args.online,
+            n_features=2 ** args.hash_bits,
+            batch_size=args.batch_size,
+            test_size=args.test_size,
+            random_state=args.random_state,
+            profiler=profiler,
+            pos_model=args.pos_model,
+            **_layer_kwargs(args)
+        )
+    else:
+        bundle, evaluation, train_hash = train_model(
+            data,
+            layer_k=_layer_k(args.layer_k),
+            selection_method=args.selection_method,
+            boosting_mode=args.boosting,
+            test_size=args.test_size,
+            random_state=args.random_state,
+            profiler=profiler,
+            pos_model=args.pos_model,
+            compact_features=args.compact_features,
+            memory_budget_mb=args.memory_budget_mb,
+            **_layer_kwargs(args)
+        )
+
+    with profiler.stage('bundle/save'):
+        bundle.save(args.model, train_hash=train_hash, compact_vectorizers=args.compact)
+
+    _write_json(evaluation, args.output)
+    if args.profile is not None:
+        profiler.write(args.profile)
+
+
+def update(args):
+    from fake_news_detection.bundle import ModelBundle
+    from fake_news_detection.pipeline import update_model
+    from fake_news_detection.profiling import StageProfiler
+    from fake_news_detection.resources import ensure_nltk_resources
+
+    ensure_nltk_resources()
+    profiler = StageProfiler(enabled=args.profile is not None)
+
+    with profiler.stage('load_dataset') as stage:
+        data = stage.count(_load(args))
+    data = _dedup(data, args, profiler)
+    with profiler.stage('bundle/load'):
+        bundle = ModelBundle.load(args.model)
+
+    bundle, evaluation, train_hash = update_model(bundle, data, batch_size=args.batch_size, profiler=profiler,
+                                                  **_layer_kwargs(args))
+
+    with profiler.stage('bundle/save'):
+        bundle.save(args.save_to or args.model, train_hash=train_hash)
+
+    _write_json(evaluation, args.output)
+    if args.profile is not None:
+        profiler.write(args.profile)
+
+
+def evaluate(args):
+    from fake_news_detection.inference import Predictor
+    from fake_news_detection.ingest import LABEL_COLUMN
+    from fake_news_detection.pipeline import article_texts, evaluate_predictions
+    from fake_news_detection.resources import ensure_nltk_resources
+
+    ensure_nltk_resources()
+    data = _load(args)
+    predictor = Predictor.from_directory(args.model)
+    predictions = [result['label'] for result in predictor.predict(article_texts(data))]
+    _write_json(evaluate_predictions(data[LABEL_COLUMN].astype('str'), predictions, predictor.bundle.labels),
+                args.output)
+
+
+def predict(args):
+    from fake_news_detection.inference import Predictor
+    from fake_news_detection.resources import ensure_nltk_resources
+
+    texts = args.texts or [line.rstrip('\n') for line in sys.stdin if line.strip()]
+    ensure_nltk_resources()
+    predictor = Predictor.from_directory(args.model)
+
+    for start in range(0, len(texts), args.batch_size):
+        for result in predictor.predict(texts[start:start + args.batch_size]):
+            sys.stdout.write(json.dumps(result) + '\n')
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['serve']:
+        # The server keeps its own options (see fake_news_detection.server)
+        from fake_news_detection import server
+        return server.main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog='fake_news_detection', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help='train the three-layer model and save the bundle')
+    train_parser.add_argument('--data', type=_source, action='append', required=True,
+                              help='TSV file, optionally path:label,... to drop raw labels from it')
+    train_parser.add_argument('--model', default='three_layer_model', help='bundle directory to write')
+    train_parser.add_argument('--cache-path', help='Parquet copy of the parsed TSVs')
+    train_parser.add_argument('--feature-cache', help='directory caching the derived text layers')
+    train_parser.add_argument('--boosting', choices=['exact', 'hist'], default='exact',
+                              help="'hist' saves the SVD + histogram booster instead (opt-in)")
+    train_parser.add_argument('--dedup-threshold', type=float,
+                              help='drop articles this similar (MinHash Jaccard, e.g. 0.8) to an earlier one')
+    train_parser.add_argument('--dedup-report', help='CSV listing every dropped near-duplicate')
+    train_parser.add_argument('--layer-k', nargs='*', metavar='LAYER=K',
+                              help='columns to keep per layer, e.g. text=20000')
+    train_parser.add_argument('--selection-method', choices=['chi2', 'mutual_info', 'df'], default='chi2')
+    train_parser.add_argument('--test-size', type=float, default=0.2)
+    train_parser.add_argument('--random-state', type=int, default=42)
+    train_parser.add_argument('--jobs', type=int, default=-1, help='cleaning worker processes')
+    train_parser.add_argument('--pos-model', default='en')
+    train_parser.add_argument('--online', choices=['sgd', 'pa', 'nb'],
+                              help='train an updatable model on hashed features with this partial_fit classifier')
+    train_parser.add_argument('--hash-bits', type=int, default=20, help='log2 of the hashed columns per layer')
+    train_parser.add_argument('--batch-size', type=int, help='articles per partial_fit call with --online')
+    train_parser.add_argument('--compact-features', action='store_true',
+                              help='float32 layers with vocabularies pruned by document frequency')
+    train_parser.add_argument('--memory-budget-mb', type=float, default=256,
+                              help='cap on the vocabulary counting table with --compact-features')
+    train_parser.add_argument('--compact', action='store_true', help='export the TF-IDF vocabularies as arrays')
+    train_parser.add_argument('--output', help='write the held-out evaluation here instead of stdout')
+    train_parser.add_argument('--profile', help='write the per-stage run report here')
+    train_parser.add_argument('--profile-dir', help='also write a cProfile dump per stage here')
+    train_parser.set_defaults(handler=train)
+
+    update_parser = commands.add_parser('update', help='learn a batch of labelled articles into an --online bundle')
+    update_parser.add_argument('--model', default='three_layer_model')
+    update_parser.add_argument('--data', type=_source, action='append', required=True)
+    update_parser.add_argument('--save-to', help='bundle directory to write instead of updating --model in place')
+    update_parser.add_argument('--cache-path')
+    update_parser.add_argument('--feature-cache')
+    update_parser.add_argument('--jobs', type=int, default=-1)
+    update_parser.add_argument('--dedup-threshold', type=float)
+    update_parser.add_argument('--dedup-report')
+    update_parser.add_argument('--batch-size', type=int)
+    update_parser.add_argument('--output', help='write the evaluation of the batch, scored before the update')
+    update_parser.add_argument('--profile')
+    update_parser.set_defaults(handler=update)
+
+    evaluate_parser = commands.add_parser('evaluate', help='score a saved bundle on labelled TSV files')
+    evaluate_parser.add_argument('--model', default='three_layer_model')
+    evaluate_parser.add_argument('--data', type=_source, action='append', required=True)
+    evaluate_parser.add_argument('--cache-path')
+    evaluate_parser.add_argument('--output')
+    evaluate_parser.set_defaults(handler=evaluate)
+
+    predict_parser = commands.add_parser('predict', help='print one JSON prediction per article')
+    predict_parser.add_argument('--model', default='three_layer_model')
+    predict_parser.add_argument('--batch-size', type=int, default=256)
+    predict_parser.add_argument('texts', nargs='*', help='articles to score; read one per line from stdin if none')
+    predict_parser.set_defaults(handler=predict)
+
+    commands.add_parser('serve', help='run the HTTP prediction server (see serve --help)')
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import hashlib
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+
+CONFIG_FILE = 'config.json'
+EXPORTED_PARAMS = [
+    'lowercase', 'strip_accents', 'token_pattern', 'ngram_range', 'analyzer',
+    'stop_words', 'binary', 'norm', 'use_idf', 'sublinear_tf',
+]
+
+
+def term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class CompactTfidfVectorizer:
+    """Drop-in ``transform`` for a fitted ``TfidfVectorizer`` without its vocabulary dict.
+
+    The vocabulary is kept as a sorted array of 64 bit term hashes plus the
+    column each hash maps to, next to the ``idf_`` array. All three are
+    plain ``.npy`` files that ``load`` memory-maps, so workers share the
+    pages and start without unpickling millions of n-gram strings.
+    """
+
+    def __init__(self, params, hashes, columns, idf, dtype='float64', directory=None):
+        self.params = params
+        self.hashes = hashes
+        self.columns = columns
+        self.idf_ = idf
+        self.dtype = np.dtype(dtype)
+        # Set when saved inside a model bundle: the arrays are then left out
+        # of the pickle and memory-mapped back by ``attach``
+        self.directory = directory
+        self._analyzer = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__, _analyzer=None)
+        if self.directory is not None:
+            state.update(hashes=None, columns=None, idf_=None)
+        return state
+
+    def attach(self, base_directory, mmap_mode='r'):
+        loaded = self.load(os.path.join(base_directory, self.directory), mmap_mode)
+        self.hashes, self.columns, self.idf_ = loaded.hashes, loaded.columns, loaded.idf_
+        return self
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        params = vectorizer.get_params()
+        if params.get('tokenizer') is not None or params.get('preprocessor') is not None \
+                or callable(params.get('analyzer')):
+            raise ValueError('Vectorizers with custom callables cannot be exported')
+
+        exported = {name: params[name] for name in EXPORTED_PARAMS}
+        exported['ngram_range'] = list(exported['ngram_range'])
+        if exported['stop_words'] is not None and not isinstance(exported['stop_words'], str):
+            exported['stop_words'] = sorted(exported['stop_words'])
+
+        n_terms = len(vectorizer.vocabulary_)
+        hashes = np.empty(n_terms, dtype=np.uint64)
+        columns = np.empty(n_terms, dtype=np.int32 if n_terms < 2 ** 31 else np.int64)
+        for i, (term, column) in enumerate(vectorizer.vocabulary_.items()):
+            hashes[i] = term_hash(term)
+            columns[i] = column
+
+        order = np.argsort(hashes, kind='stable')
+        hashes, columns = hashes[order], columns[order]
+        if np.any(hashes[1:] == hashes[:-1]):
+            raise ValueError('Term hash collision in the vocabulary')
+
+        idf = np.asarray(vectorizer.idf_) if params['use_idf'] else np.ones(n_terms)
+        return cls(exported, hashes, columns, idf, np.dtype(params['dtype']).name)
+
+    @property
+    def n_features_(self):
+        return len(self.idf_)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'hashes.npy'), self.hashes)
+        np.save(os.path.join(directory, 'columns.npy'), self.columns)
+        np.save(os.path.join(directory, 'idf.npy'), self.idf_)
+        with open(os.path.join(directory, CONFIG_FILE), 'w') as f:
+            json.dump({'params': self.params, 'dtype': self.dtype.name}, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, CONFIG_FILE)) as f:
+            config = json.load(f)
+        arrays = [np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode)
+                  for name in ('hashes', 'columns', 'idf')]
+        return cls(config['params'], *arrays, dtype=config['dtype'])
+
+    def build_analyzer(self):
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            params = dict(self.params, ngram_range=tuple(self.params['ngram_range']))
+            self._analyzer = TfidfVectorizer(**params).build_analyzer()
+        return self._analyzer
+
+    def transform(self, texts):
+        analyze = self.build_analyzer()
+        rows, term_hashes = [], []
+        n_rows = 0
+        for row, text in enumerate(texts):
+            terms = analyze(text)
+            rows.extend([row] * len(terms))
+            term_hashes.extend([term_hash(term) for term in terms])
+            n_rows = row + 1
+
+        term_hashes = np.asarray(term_hashes, dtype=np.uint64)
+        rows = np.asarray(rows, dtype=np.int64)
+
+        position = np.searchsorted(self.hashes, term_hashes)
+        position[position == len(self.hashes)] = 0
+        known = self.hashes[position] == term_hashes if len(self.hashes) else position < 0
+
+        counts = sp.csr_matrix(
+            (np.ones(known.sum(), dtype=self.dtype), (rows[known], self.columns[position[known]])),
+            shape=(n_rows, self.n_features_), dtype=self.dtype,
+        )
+        counts.sum_duplicates()
+
+        if self.params['binary']:
+            counts.data[:] = 1
+        if self.params['sublinear_tf']:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1
+        if self.params['use_idf']:
+            counts.data *= self.idf_[counts.indices]
+        if self.params['norm'] and n_rows:
+            counts = normalize(counts, norm=self.params['norm'], copy=False)
+
+        return counts
+
+
+# Rough cost of one document-frequency entry on top of its term string: the
+# dict slot, the key hash and the int object
+DF_ENTRY_BYTES = 100
+
+
+class StreamingTfidfVectorizer:
+    """TF-IDF with a pruned vocabulary, learned under a memory budget.
+
+    ``fit`` streams the documents once, counting in how many documents
+    every term appears. Whenever the estimated size of that table goes
+    over ``memory_budget_mb`` just enough of the rarest terms are dropped
+    to bring it back to half the budget; ``prune_floor_`` is the largest
+    count dropped this way, so counts up to it may be underestimated. The
+    sizes are estimated from the term strings plus a fixed per-entry cost,
+    so the budget bounds the table only approximately. The kept terms are
+    then filtered with ``min_df`` / ``max_df`` / ``max_features`` (most
+    frequent documents first), and the idf weights come straight from the
+    counts. The fitted model is a plain ``TfidfVectorizer``
+    (``vectorizer_``) with a fixed vocabulary, producing ``dtype`` values
+    with int32 indices.
+    """
+
+    def __init__(self, ngram_range=(1, 1), stop_words=None, min_df=2, max_df=1.0, max_features=None,
+                 memory_budget_mb=256, dtype=np.float32):
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+        self.memory_budget_mb = memory_budget_mb
+        self.dtype = dtype
+
+    def _tfidf(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(stop_words=self.stop_words, ngram_range=self.ngram_range, dtype=self.dtype)
+
+    def _prune(self, document_frequency, budget):
+        """Drop just enough of the rarest terms to get down to half of ``budget``.
+
+        Terms are dropped by ascending count, so only part of the terms at
+        the highest dropped count may go. Returns the measured bytes per entry.
+        """
+        terms = list(document_frequency)
+        counts = np.fromiter(document_frequency.values(), dtype=np.int64, count=len(terms))
+        sizes = np.fromiter((sys.getsizeof(term) for term in terms), dtype=np.int64, count=len(terms))
+        sizes += DF_ENTRY_BYTES
+        needed = sizes.sum() - budget // 2
+        if needed <= 0:
+            # The running estimate was too high; nothing has to go
+            return sizes.mean()
+
+        order = np.argsort(counts, kind='stable')
+        n_dropped = min(int(np.searchsorted(np.cumsum(sizes[order]), needed)) + 1, len(order))
+        for i in order[:n_dropped]:
+            del document_frequency[terms[i]]
+        self.prune_floor_ = max(self.prune_floor_, int(counts[order[n_dropped - 1]]))
+        return sizes.mean()
+
+    def fit(self, texts):
+        analyze = self._tfidf().build_analyzer()
+        budget = int(self.memory_budget_mb * 2 ** 20)
+        document_frequency = Counter()
+        # Refined from the actual terms at every prune
+        entry_bytes = DF_ENTRY_BYTES + 60
+        n_documents = 0
+        self.prune_floor_ = 0
+
+        for text in texts:
+            n_documents += 1
+            document_frequency.update(set(analyze(text)))
+            if len(document_frequency) * entry_bytes > budget:
+                entry_bytes = self._prune(document_frequency, budget)
+
+        min_df = self.min_df if isinstance(self.min_df, int) else int(np.ceil(self.min_df * n_documents))
+        max_df = self.max_df if isinstance(self.max_df, int) else int(np.floor(self.max_df * n_documents))
+        kept = [(term, count) for term, count in document_frequency.items() if min_df <= count <= max_df]
+        if self.max_features is not None and len(kept) > self.max_features:
+            kept.sort(key=lambda item: (-item[1], item[0]))
+            kept = kept[:self.max_features]
+        kept.sort()
+
+        self.n_documents_ = n_documents
+        self.vectorizer_ = self._tfidf()
+        self.vectorizer_.vocabulary_ = {term: j for j, (term, _) in enumerate(kept)}
+        counts = np.asarray([count for _, count in kept], dtype=np.float64)
+        self.vectorizer_.idf_ = np.log((1.0 + n_documents) / (1.0 + counts)) + 1.0
+        return self
+
+    def transform(self, texts):
+        return self.vectorizer_.transform(texts)
+
+    def fit_transform(self, texts):
+        texts = texts if isinstance(texts, (list, tuple)) else list(texts)
+        return self.fit(texts).transform(texts)
+
+    def get_feature_names_out(self):
+        return self.vectorizer_.get_feature_names_out()
+
+    get_feature_names = get_feature_names_out
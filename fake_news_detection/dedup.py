@@ -0,0 +1,186 @@
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+TOKEN = re.compile(r'\w+')
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingle_hashes(text, shingle_size=5):
+    """32 bit hashes of the overlapping ``shingle_size``-word shingles of ``text`` (lower-cased)."""
+    tokens = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in TOKEN.findall(text.lower())),
+                         dtype=np.uint64)
+    if len(tokens) == 0:
+        return tokens
+    # Texts shorter than a shingle are a single shingle
+    width = min(shingle_size, len(tokens))
+    n_shingles = len(tokens) - width + 1
+    shingles = np.zeros(n_shingles, dtype=np.uint64)
+    for offset in range(width):
+        shingles = shingles * np.uint64(0x9E3779B1) + tokens[offset:offset + n_shingles]
+    return np.unique(shingles & MAX_HASH)
+
+
+def candidate_probability(similarity, bands, rows):
+    """Probability that two signatures of Jaccard ``similarity`` share a bucket in at least one band."""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def lsh_bands(threshold, num_perm, recall=0.99):
+    """``(bands, rows)`` with ``bands * rows <= num_perm`` for LSH at ``threshold``.
+
+    Picks the longest bands (fewest dissimilar candidates) that still make
+    a pair exactly at ``threshold`` a candidate with probability
+    ``recall``, e.g. 21 bands of 6 rows for 0.8 and 128 permutations.
+    """
+    for rows in range(num_perm, 0, -1):
+        if candidate_probability(threshold, num_perm // rows, rows) >= recall:
+            return num_perm // rows, rows
+    return num_perm, 1
+
+
+class MinHashDeduplicator:
+    """Clusters near-duplicate articles with MinHash signatures and LSH banding.
+
+    Every text becomes the set of its ``shingle_size``-word shingles and a
+    ``num_perm``-value MinHash signature, whose agreement rate estimates
+    the Jaccard similarity of two shingle sets. Signatures are cut into
+    bands (see ``lsh_bands``); articles sharing any band bucket are
+    candidates. Every pair within a bucket is verified, except in buckets
+    of more than ``max_bucket`` articles (typically boilerplate), where
+    each article is only compared with the next one. Pairs estimated at
+    ``threshold`` similarity or more are merged into one cluster, so
+    clusters are transitive. Articles without a single word never match.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, seed=1, perm_chunk=16, recall=0.99,
+                 max_bucket=200):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.perm_chunk = perm_chunk
+        self.max_bucket = max_bucket
+
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = lsh_bands(threshold, num_perm, recall)
+
+    def signatures(self, texts):
+        """``(n_texts, num_perm)`` MinHash signatures; all-max rows for texts without words."""
+        shingles = [shingle_hashes(str(text), self.shingle_size) for text in texts]
+        lengths = np.array([len(s) for s in shingles])
+        signatures = np.full((len(shingles), self.num_perm), MAX_HASH, dtype=np.uint64)
+
+        present = np.flatnonzero(lengths)
+        if len(present) == 0:
+            return signatures
+        values = np.concatenate([shingles[i] for i in present])
+        starts = np.concatenate([[0], np.cumsum(lengths[present])[:-1]])
+
+        # Every permutation is a multiply-shift hash, the top 32 bits of
+        # (a * x + b) mod 2 ** 64 for odd a; a few permutations at a time
+        # bound the temporary arrays
+        for lo in range(0, self.num_perm, self.perm_chunk):
+            hi = min(lo + self.perm_chunk, self.num_perm)
+            hashed = (self.a[lo:hi, None] * values + self.b[lo:hi, None]) >> np.uint64(32)
+            signatures[present, lo:hi] = np.minimum.reduceat(hashed, starts, axis=1).T
+        return signatures
+
+    def candidate_pairs(self, signatures):
+        """``(n_pairs, 2)`` array of the distinct ``(i, j)``, ``i < j``, sharing a bucket in some band."""
+        empty = np.all(signatures == MAX_HASH, axis=1)
+        pairs = [np.empty((0, 2), dtype=np.intp)]
+        for band in range(self.bands):
+            keys = signatures[:, band * self.rows:(band + 1) * self.rows]
+            _, bucket, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+            bucket = bucket.ravel()
+            members = np.flatnonzero((counts[bucket] > 1) & ~empty)
+            if len(members) == 0:
+                continue
+
+            members = members[np.argsort(bucket[members], kind='stable')]
+            bounds = np.flatnonzero(np.r_[True, bucket[members[1:]] != bucket[members[:-1]], True])
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                group = members[start:stop]
+                if len(group) <= self.max_bucket:
+                    i, j = np.triu_indices(len(group), 1)
+                else:
+                    i = np.arange(len(group) - 1)
+                    j = i + 1
+                pairs.append(np.column_stack([group[i], group[j]]))
+        return np.unique(np.concatenate(pairs), axis=0)
+
+    def clusters(self, texts):
+        """Cluster id (the first member's position) of every text and its estimated similarity to it."""
+        signatures = self.signatures(texts)
+        n_texts = len(signatures)
+        parent = np.arange(n_texts)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        pairs = self.candidate_pairs(signatures)
+        agreement = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        for i, j in pairs[agreement >= self.threshold]:
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        cluster = np.array([find(i) for i in range(n_texts)], dtype=np.intp)
+        similarity = (signatures == signatures[cluster]).mean(axis=1)
+        return cluster, similarity
+
+
+def drop_near_duplicates(data, texts, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+    """Keep the first article of every near-duplicate cluster of ``data``.
+
+    ``texts`` holds one string per row (the title and text of an article).
+    Returns the kept rows and a report with one line per removed article:
+    its row and ``public_id``, the row and ``public_id`` of the kept article
+    it duplicates, their estimated similarity (below ``threshold`` when the
+    two are only linked through other members of the cluster), both labels
+    and whether they disagree.
+    """
+    from fake_news_detection.ingest import LABEL_COLUMN
+
+    deduplicator = MinHashDeduplicator(threshold, num_perm, shingle_size, seed)
+    cluster, similarity = deduplicator.clusters(texts)
+    removed = np.flatnonzero(cluster != np.arange(len(cluster)))
+    kept_for = cluster[removed]
+
+    def column(name, rows):
+        return data[name].to_numpy()[rows] if name in data else np.full(len(rows), None)
+
+    report = pd.DataFrame({
+        'row': removed,
+        'public_id': column('public_id', removed),
+        'duplicate_of_row': kept_for,
+        'duplicate_of_id': column('public_id', kept_for),
+        'similarity': similarity[removed],
+        'label': column(LABEL_COLUMN, removed),
+        'kept_label': column(LABEL_COLUMN, kept_for),
+    })
+    report['label_conflict'] = report['label'].astype('str') != report['kept_label'].astype('str')
+
+    kept = np.ones(len(data), dtype=bool)
+    kept[removed] = False
+    return data[kept].reset_index(drop=True), report
+
+
+def summarize(report, n_articles):
+    """Counts for a ``drop_near_duplicates`` report, as plain JSON-friendly values."""
+    return {
+        'n_articles': int(n_articles),
+        'n_removed': int(len(report)),
+        'removed_share': float(len(report) / n_articles) if n_articles else 0.0,
+        'n_clusters': int(report['duplicate_of_row'].nunique()),
+        'label_conflicts': int(report['label_conflict'].sum()),
+    }
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from fake_news_detection.ingest import LABELS
+from fake_news_detection.pipeline import evaluate_predictions
+
+
+def _predict(model, X):
+    started = time.perf_counter()
+    pred = model.predict(X)
+    return pred, time.perf_counter() - started
+
+
+def plot_confusion_matrix(matrix, display_labels, title, path):
+    """Write ``matrix`` as a PNG without pyplot, so nothing is ever shown or blocks."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    matrix = np.asarray(matrix)
+    figure = Figure(figsize=(6, 5))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    image = ax.imshow(matrix, interpolation='nearest', cmap='Blues')
+    figure.colorbar(image, ax=ax)
+    ax.set_title(title)
+
+    ticks = np.arange(len(display_labels))
+    ax.set_xticks(ticks, display_labels)
+    ax.set_yticks(ticks, display_labels)
+    thresh = matrix.max() / 2.
+    for i in range(matrix.shape[0]):
+        for j in range(matrix.shape[1]):
+            ax.text(j, i, matrix[i, j], horizontalalignment='center',
+                    color='white' if matrix[i, j] > thresh else 'black')
+
+    ax.set_ylabel('Actual label')
+    ax.set_xlabel('Predicted label')
+    figure.tight_layout()
+    figure.savefig(path)
+    return path
+
+
+class EvaluationEngine:
+    """Scores every fitted model x feature set on its test rows in one batch.
+
+    Models are queued with ``add_model`` against test sets registered with
+    ``add_feature_set``; ``run`` predicts all of them from one joblib thread
+    pool (the models and matrices are shared, not copied), derives every
+    metric from that single prediction and returns one row per model. With
+    ``plot_dir`` each confusion matrix is also written as a PNG; figures
+    are drawn off-screen and never shown.
+    """
+
+    def __init__(self, labels=LABELS, display_labels=None, n_jobs=-1, plot_dir=None):
+        self.labels = list(labels)
+        self.display_labels = list(display_labels or labels)
+        self.n_jobs = n_jobs
+        self.plot_dir = plot_dir
+        self.feature_sets = {}
+        self.models = []
+        self.evaluations = {}
+        self.predictions = {}
+
+    def add_feature_set(self, name, X, y):
+        self.feature_sets[name] = (X, np.asarray(y, dtype=str))
+
+    def add_model(self, name, feature_set, model):
+        if feature_set not in self.feature_sets:
+            raise KeyError('Unknown feature set {!r}, call add_feature_set first'.format(feature_set))
+        self.models.append((name, feature_set, model))
+
+    def _row(self, name, feature_set, evaluation, seconds):
+        report = evaluation['report']
+        row = {
+            'model': name,
+            'feature_set': feature_set,
+            'n_articles': evaluation['n_articles'],
+            'accuracy': evaluation['accuracy'],
+            'macro_f1': report['macro avg']['f1-score'],
+            'weighted_f1': report['weighted avg']['f1-score'],
+        }
+        for label in self.labels:
+            row['f1_' + label] = report[label]['f1-score']
+        row['predict_seconds'] = seconds
+        return row
+
+    def run(self, results_path=None):
+        pending = [(name, feature_set, model) for name, feature_set, model in self.models
+                   if name not in self.evaluations]
+
+        outputs = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(_predict)(model, self.feature_sets[feature_set][0]) for _, feature_set, model in pending
+        )
+
+        for (name, feature_set, _), (pred, seconds) in zip(pending, outputs):
+            evaluation = evaluate_predictions(self.feature_sets[feature_set][1], pred, self.labels)
+            evaluation['row'] = self._row(name, feature_set, evaluation, seconds)
+            self.evaluations[name] = evaluation
+            self.predictions[name] = pred
+
+            if self.plot_dir is not None:
+                os.makedirs(self.plot_dir, exist_ok=True)
+                path = os.path.join(self.plot_dir, re.sub(r'[^\w.-]+', '_', name) + '.png')
+                evaluation['plot'] = plot_confusion_matrix(evaluation['confusion_matrix']['matrix'],
+                                                           self.display_labels, name, path)
+
+        if results_path is not None:
+            self.write(results_path)
+        return self.results()
+
+    def results(self):
+        return pd.DataFrame([self.evaluations[name]['row'] for name, _, _ in self.models
+                             if name in self.evaluations])
+
+    def write(self, path):
+        """Save the results table and every model's full report and confusion matrix as JSON."""
+        with open(path, 'w') as f:
+            json.dump({name: self.evaluations[name] for name, _, _ in self.models if name in self.evaluations},
+                      f, indent=2)
+        return path
@@ -0,0 +1,55 @@
+import numpy as np
+
+from fake_news_detection.bundle import ModelBundle
+from fake_news_detection.cleaning import TextCleaner
+from fake_news_detection.pos import POSTagger
+
+
+class Predictor:
+    """Scores raw articles (title and text joined by a space) with a saved bundle.
+
+    Runs clean -> POS -> Empath -> weighted union -> ``predict_proba`` on a
+    whole batch at a time, so spaCy and the sparse transforms run once per
+    batch instead of once per article.
+    """
+
+    def __init__(self, bundle, cleaner=None, pos_tagger=None):
+        self.bundle = bundle
+        self.cleaner = cleaner if cleaner is not None else TextCleaner()
+        self.pos_tagger = pos_tagger if pos_tagger is not None else POSTagger(model=bundle.pos_model)
+
+        if bundle.semantic_featurizer is None:
+            from fake_news_detection.semantics import EmpathFeaturizer
+            bundle.semantic_featurizer = EmpathFeaturizer()
+
+    @classmethod
+    def from_directory(cls, directory, **kwargs):
+        return cls(ModelBundle.load(directory), **kwargs)
+
+    @property
+    def classes(self):
+        return list(self.bundle.classifier.classes_)
+
+    def features(self, texts):
+        texts = [str(text) for text in texts]
+        return self.bundle.union.transform({
+            'text': self.cleaner.clean_many(texts),
+            'pos': self.pos_tagger.tag_many(texts),
+            'sem': self.bundle.semantic_featurizer.transform(texts),
+        })
+
+    def predict_proba(self, texts):
+        if not texts:
+            return np.empty((0, len(self.classes)))
+        return self.bundle.classifier.predict_proba(self.features(texts))
+
+    def predict(self, texts):
+        """Return one ``{'label': ..., 'probabilities': {...}}`` dict per text."""
+        classes = self.classes
+        results = []
+        for row in self.predict_proba(texts):
+            results.append({
+                'label': classes[int(np.argmax(row))],
+                'probabilities': dict(zip(classes, row.tolist())),
+            })
+        return results
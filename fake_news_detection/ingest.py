@@ -0,0 +1,84 @@
+import os
+import json
+
+import pandas as pd
+
+
+LABELS = ['FALSE', 'TRUE', 'PARTIALLY FALSE', 'OTHER']
+LABEL_COLUMN = 'our rating'
+COLUMN_DTYPES = {'public_id': str, 'title': str, 'text': str, LABEL_COLUMN: str}
+NORMALIZED_LABELS = {label.lower(): label for label in LABELS}
+
+
+def read_tsv(path, exclude_labels=(), chunksize=50000, encoding='mac_roman'):
+    """Yield typed chunks of a CLEF TSV file with the labels normalized.
+
+    Rows whose raw label is in ``exclude_labels`` are dropped before the
+    labels are upper-cased, exactly as the notebook drops the lowercase
+    ``false`` rows of ``data2.tsv``.
+    """
+    chunks = pd.read_csv(path, sep='\t', encoding=encoding, dtype=COLUMN_DTYPES, chunksize=chunksize)
+    for chunk in chunks:
+        if exclude_labels:
+            chunk = chunk[~chunk[LABEL_COLUMN].isin(exclude_labels)]
+        yield chunk.assign(**{LABEL_COLUMN: chunk[LABEL_COLUMN].replace(NORMALIZED_LABELS)})
+
+
+def _fingerprint(sources):
+    return [{
+        'path': os.path.abspath(path),
+        'exclude_labels': sorted(exclude_labels),
+        'size': os.path.getsize(path),
+        'mtime': os.path.getmtime(path),
+    } for path, exclude_labels in sources]
+
+
+def _read_cache(cache_path, fingerprint):
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(cache_path):
+        return None
+    metadata = pq.read_schema(cache_path).metadata or {}
+    if json.loads(metadata.get(b'sources', b'null')) != fingerprint:
+        return None
+    return pd.read_parquet(cache_path)
+
+
+def _write_cache(cache_path, data, fingerprint):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {}, sources=json.dumps(fingerprint))
+    pq.write_table(table.replace_schema_metadata(metadata), cache_path)
+
+
+def load_dataset(sources, cache_path=None, chunksize=50000, encoding='mac_roman'):
+    """Load and concatenate ``(path, exclude_labels)`` sources in one pass.
+
+    The label column is returned as a categorical with the four CLEF labels
+    first. With ``cache_path`` the result is also written to Parquet and
+    later calls read it back without parsing, as long as the source files
+    are unchanged.
+    """
+    sources = [(path, tuple(exclude_labels)) for path, exclude_labels in sources]
+    fingerprint = _fingerprint(sources)
+
+    if cache_path is not None:
+        data = _read_cache(cache_path, fingerprint)
+        if data is not None:
+            return data
+
+    chunks = [chunk for path, exclude_labels in sources
+              for chunk in read_tsv(path, exclude_labels, chunksize, encoding)]
+    data = pd.concat(chunks, ignore_index=True)
+    del chunks
+
+    observed = data[LABEL_COLUMN].dropna().unique()
+    categories = LABELS + sorted(set(observed) - set(LABELS))
+    data[LABEL_COLUMN] = pd.Categorical(data[LABEL_COLUMN], categories=categories)
+
+    if cache_path is not None:
+        _write_cache(cache_path, data, fingerprint)
+
+    return data
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.model_selection import StratifiedKFold
+
+
+def class_feature_counts(X, y, classes):
+    """Per-class summed feature values and class sizes, as MultinomialNB accumulates them."""
+    Y = (np.asarray(y)[:, None] == classes[None, :]).astype(np.float64)
+    return np.asarray(sp.csr_matrix(X).T @ Y).T, Y.sum(axis=0)
+
+
+def _alpha_path_predictions(feature_count, class_count, X, alphas, fit_prior=True, max_block=2 ** 24):
+    """Predicted class indices of ``X`` for every alpha, shape (n_alphas, n_rows)."""
+    n_classes, n_features = feature_count.shape
+    X = sp.csr_matrix(X)
+    row_sums = np.asarray(X.sum(axis=1))
+    class_totals = feature_count.sum(axis=1)
+
+    if fit_prior:
+        with np.errstate(divide='ignore'):
+            prior = np.log(class_count) - np.log(class_count.sum())
+    else:
+        prior = np.full(n_classes, -np.log(n_classes))
+
+    predictions = np.empty((len(alphas), X.shape[0]), dtype=np.intp)
+    # Several alphas share one sparse product while the dense weights stay under max_block values
+    step = max(1, max_block // (n_classes * n_features))
+
+    for start in range(0, len(alphas), step):
+        block = np.asarray(alphas[start:start + step], dtype=np.float64)
+        log_numerator = np.log(feature_count[None, :, :] + block[:, None, None])
+        scores = X @ log_numerator.reshape(-1, n_features).T
+        scores = scores.reshape(X.shape[0], len(block), n_classes)
+
+        log_denominator = np.log(class_totals[None, :] + block[:, None] * n_features)
+        scores -= row_sums[:, :, None] * log_denominator[None, :, :]
+        scores += prior
+
+        predictions[start:start + len(block)] = scores.argmax(axis=2).T
+
+    return predictions
+
+
+def alpha_path_scores(X_train, y_train, alphas, X_test=None, y_test=None, cv=5, fit_prior=True):
+    """Accuracy of ``MultinomialNB(alpha)`` for a whole grid of alphas in one pass.
+
+    The per-class feature sums do not depend on alpha, so they are computed
+    once (and per CV fold by subtracting the held-out rows) and every alpha
+    only changes the log-probabilities. Returns a DataFrame with one row per
+    alpha, a column per CV fold, ``cv_mean`` and, when a test set is given,
+    ``test``.
+    """
+    alphas = np.asarray(alphas, dtype=np.float64)
+    if np.any(alphas <= 0):
+        raise ValueError('alpha must be > 0, alpha=0 gives infinite log-probabilities')
+
+    X_train = sp.csr_matrix(X_train)
+    y_train = np.asarray(y_train)
+    classes = np.unique(y_train)
+    feature_count, class_count = class_feature_counts(X_train, y_train, classes)
+
+    table = pd.DataFrame({'alpha': alphas})
+
+    if cv:
+        folds = StratifiedKFold(cv).split(np.zeros(len(y_train)), y_train)
+        for i, (_, valid) in enumerate(folds):
+            held_count, held_classes = class_feature_counts(X_train[valid], y_train[valid], classes)
+            predictions = _alpha_path_predictions(feature_count - held_count, class_count - held_classes,
+                                                  X_train[valid], alphas, fit_prior)
+            table['cv_fold_{}'.format(i)] = (classes[predictions] == y_train[valid]).mean(axis=1)
+        table['cv_mean'] = table.filter(like='cv_fold_').mean(axis=1)
+
+    if X_test is not None:
+        predictions = _alpha_path_predictions(feature_count, class_count, X_test, alphas, fit_prior)
+        table['test'] = (classes[predictions] == np.asarray(y_test)).mean(axis=1)
+
+    return table
+
+
+def best_alpha(scores):
+    """The alpha with the best cross-validated (or, without CV, test) accuracy."""
+    column = 'cv_mean' if 'cv_mean' in scores else 'test'
+    return float(scores.loc[scores[column].idxmax(), 'alpha'])
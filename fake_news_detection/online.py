@@ -0,0 +1,187 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from fake_news_detection.union import WeightedFeatureUnion
+
+
+def _idf(document_frequency, n_documents):
+    # TfidfTransformer(smooth_idf=True): ln((1 + n) / (1 + df)) + 1
+    return np.log((1.0 + n_documents) / (1.0 + document_frequency)) + 1.0
+
+
+def _scale_columns(counts, idf, norm):
+    counts = sp.csr_matrix(counts, dtype=np.float64)
+    counts.data *= idf[counts.indices]
+    return normalize(counts, norm=norm, copy=False) if norm else counts
+
+
+class HashedTfidfVectorizer:
+    """TF-IDF over hashed n-grams with running document frequencies.
+
+    The hashing trick maps every n-gram to one of ``n_features`` columns, so
+    the feature space never depends on the articles seen. ``partial_fit``
+    only adds the batch's document frequencies to the running counts; the
+    idf weights follow from them at ``transform`` time with the smoothed
+    formula of ``TfidfVectorizer``.
+    """
+
+    def __init__(self, n_features=2 ** 20, ngram_range=(1, 3), stop_words='english', norm='l2'):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.norm = norm
+        self.hasher = HashingVectorizer(n_features=n_features, ngram_range=ngram_range, stop_words=stop_words,
+                                        alternate_sign=False, norm=None)
+        self.document_frequency_ = np.zeros(n_features, dtype=np.int64)
+        self.n_documents_ = 0
+
+    @property
+    def n_features_(self):
+        return self.n_features
+
+    def _update(self, counts):
+        self.document_frequency_ += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents_ += counts.shape[0]
+
+    def partial_fit(self, texts):
+        self._update(self.hasher.transform(texts))
+        return self
+
+    fit = partial_fit
+
+    def transform(self, texts):
+        idf = _idf(self.document_frequency_, self.n_documents_)
+        return _scale_columns(self.hasher.transform(texts), idf, self.norm)
+
+    def partial_fit_transform(self, texts):
+        counts = self.hasher.transform(texts)
+        self._update(counts)
+        return _scale_columns(counts, _idf(self.document_frequency_, self.n_documents_), self.norm)
+
+    fit_transform = partial_fit_transform
+
+
+class RunningSemanticTfidf:
+    """TF-IDF over Empath category counts with running document frequencies.
+
+    The Empath categories are already a fixed feature space, so unlike
+    ``SemanticTfidf`` no column is dropped for having no hits yet: every
+    category outside ``stop_words`` keeps its column, in sorted order.
+    """
+
+    def __init__(self, categories, stop_words='english', norm='l2'):
+        if stop_words == 'english':
+            stop_words = ENGLISH_STOP_WORDS
+        self.categories = list(categories)
+        self.norm = norm
+        kept = [j for j, category in enumerate(self.categories) if category not in frozenset(stop_words or ())]
+        kept.sort(key=lambda j: self.categories[j])
+        self.columns_ = np.asarray(kept, dtype=np.intp)
+        self.document_frequency_ = np.zeros(len(kept), dtype=np.int64)
+        self.n_documents_ = 0
+
+    @property
+    def n_features_(self):
+        return len(self.columns_)
+
+    def _counts(self, counts):
+        return sp.csr_matrix(counts)[:, self.columns_]
+
+    def _update(self, counts):
+        counts.eliminate_zeros()
+        self.document_frequency_ += np.bincount(counts.indices, minlength=len(self.columns_))
+        self.n_documents_ += counts.shape[0]
+
+    def partial_fit(self, counts):
+        self._update(self._counts(counts))
+        return self
+
+    fit = partial_fit
+
+    def transform(self, counts):
+        idf = _idf(self.document_frequency_, self.n_documents_)
+        return _scale_columns(self._counts(counts), idf, self.norm)
+
+    def partial_fit_transform(self, counts):
+        counts = self._counts(counts)
+        self._update(counts)
+        return _scale_columns(counts, _idf(self.document_frequency_, self.n_documents_), self.norm)
+
+    fit_transform = partial_fit_transform
+
+    def get_feature_names(self):
+        return [self.categories[j] for j in self.columns_]
+
+    get_feature_names_out = get_feature_names
+
+
+def online_union(categories, layers, n_features=2 ** 20, ngram_range=(1, 3), dtype=np.float64):
+    """A ``WeightedFeatureUnion`` of hashed layers; ``layers`` lists ``(name, weight)`` in column order."""
+    vectorizers = {
+        'pos': HashedTfidfVectorizer(n_features, ngram_range),
+        'text': HashedTfidfVectorizer(n_features, ngram_range),
+        'sem': RunningSemanticTfidf(categories),
+    }
+    return WeightedFeatureUnion([(name, vectorizers[name], weight) for name, weight in layers], dtype=dtype)
+
+
+def union_partial_fit_transform(union, inputs):
+    """Add ``inputs`` to every layer's document frequencies, then vectorize them."""
+    return union.combine([vectorizer.partial_fit_transform(inputs[name]) for name, vectorizer, _ in union.layers])
+
+
+ONLINE_CLASSIFIERS = ('sgd', 'pa', 'nb')
+
+
+def make_online_classifier(name, random_state=0):
+    """``'sgd'`` (logistic loss), ``'pa'`` (passive-aggressive) or ``'nb'`` (multinomial naive Bayes)."""
+    if name == 'sgd':
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=random_state)
+    if name == 'pa':
+        # PassiveAggressiveClassifier is deprecated in favour of this configuration
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss='hinge', penalty=None, learning_rate='pa1', eta0=1.0, random_state=random_state)
+    if name == 'nb':
+        from sklearn.naive_bayes import MultinomialNB
+        return MultinomialNB(alpha=0.01)
+    raise ValueError('online classifier must be one of {}, got {!r}'.format(ONLINE_CLASSIFIERS, name))
+
+
+class OnlineClassifier:
+    """Wraps a ``partial_fit`` estimator with the fixed label set of the model.
+
+    Every update only sees its own batch, so the full label set is passed
+    on the first call. Estimators without ``predict_proba`` (the hinge loss
+    of passive-aggressive) get a softmax of their decision scores, so the
+    ``Predictor`` can treat every bundle alike.
+    """
+
+    def __init__(self, estimator, labels):
+        self.estimator = estimator
+        self.labels = list(labels)
+        self.n_samples_seen_ = 0
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def partial_fit(self, X, y):
+        if self.n_samples_seen_ == 0:
+            self.estimator.partial_fit(X, y, classes=self.labels)
+        else:
+            self.estimator.partial_fit(X, y)
+        self.n_samples_seen_ += X.shape[0]
+        return self
+
+    def predict(self, X):
+        return self.estimator.predict(X)
+
+    def predict_proba(self, X):
+        if hasattr(self.estimator, 'predict_proba'):
+            return self.estimator.predict_proba(X)
+        scores = self.estimator.decision_function(X)
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
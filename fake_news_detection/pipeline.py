@@ -0,0 +1,265 @@
+import numpy as np
+
+from fake_news_detection.ingest import LABELS, LABEL_COLUMN
+from fake_news_detection.profiling import StageProfiler
+
+
+LAYER_WEIGHTS = {'pos': 0.15 * 3, 'text': 0.5 * 3, 'sem': 0.35 * 3}
+# Column order of the combined matrix, as in the notebook's hstack
+LAYER_ORDER = ['pos', 'text', 'sem']
+
+
+def article_texts(data):
+    """Title and text joined by a space, as the notebook combines them."""
+    return (data['title'].fillna('') + ' ' + data['text'].fillna('')).astype('str').tolist()
+
+
+def build_layers(texts, feature_cache=None, cleaning_jobs=-1, cleaning_chunk_size=500, pos_model='en',
+                 pos_batch_size=256, pos_jobs=1, empath_featurizer=None, profiler=None):
+    """The three derived layers of ``texts`` in the form ``WeightedFeatureUnion.transform`` takes.
+
+    Returns ``(layers, empath_featurizer)`` where ``layers`` maps ``'text'``
+    to the cleaned texts, ``'pos'`` to the POS tag strings and ``'sem'`` to
+    the Empath category counts. With a ``FeatureCache`` every layer is only
+    computed for articles it has not seen.
+    """
+    from fake_news_detection.cleaning import clean_parallel
+    from fake_news_detection.pos import POSTagger
+    from fake_news_detection.semantics import EmpathFeaturizer
+
+    profiler = profiler or StageProfiler(enabled=False)
+    empath_featurizer = empath_featurizer or EmpathFeaturizer()
+    pos_tagger = POSTagger(model=pos_model, batch_size=pos_batch_size, n_process=pos_jobs)
+    n_categories = len(empath_featurizer.categories)
+
+    def clean(batch):
+        return clean_parallel(batch, n_jobs=cleaning_jobs, chunk_size=cleaning_chunk_size)
+
+    with profiler.stage('clean_text') as stage:
+        if feature_cache is None:
+            clean_texts = clean(texts)
+        else:
+            clean_texts = feature_cache.text_layer('clean_text', 'v1', texts, clean)
+        stage.count(clean_texts)
+
+    with profiler.stage('pos_tagging') as stage:
+        if feature_cache is None:
+            pos_texts = pos_tagger.tag_many(texts)
+        else:
+            pos_texts = feature_cache.text_layer('POS_text', 'v1-' + pos_model, texts, pos_tagger.tag_many)
+        stage.count(pos_texts)
+
+    with profiler.stage('empath') as stage:
+        if feature_cache is None:
+            counts = empath_featurizer.transform(texts)
+        else:
+            counts = feature_cache.sparse_layer('semantic_counts', 'v1-{}'.format(n_categories), texts,
+                                                empath_featurizer.transform, n_categories)
+        stage.count(counts)
+
+    return {'text': list(clean_texts), 'pos': list(pos_texts), 'sem': counts}, empath_featurizer
+
+
+def take_rows(layers, rows):
+    """The ``rows`` of every layer in ``layers``."""
+    return {
+        name: layer[rows] if hasattr(layer, 'tocsr') else [layer[i] for i in rows]
+        for name, layer in layers.items()
+    }
+
+
+def fit_union(layers, categories, weights=None, ngram_range=(1, 3), dtype=np.float64, compact=False,
+              min_df=2, memory_budget_mb=256):
+    """Fit the three layer vectorizers; returns the union and the training blocks in column order.
+
+    With ``compact`` the text and POS vocabularies are learned by
+    ``StreamingTfidfVectorizer`` (terms in fewer than ``min_df`` articles
+    dropped, the counting table kept under ``memory_budget_mb``) and every
+    layer and the union produce float32.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from fake_news_detection.compact import StreamingTfidfVectorizer
+    from fake_news_detection.semantics import SemanticTfidf
+    from fake_news_detection.union import WeightedFeatureUnion
+
+    weights = dict(LAYER_WEIGHTS, **(weights or {}))
+    if compact:
+        dtype = np.float32
+        vectorizers = {
+            name: StreamingTfidfVectorizer(ngram_range, stop_words='english', min_df=min_df,
+                                           memory_budget_mb=memory_budget_mb)
+            for name in ('pos', 'text')
+        }
+    else:
+        vectorizers = {name: TfidfVectorizer(stop_words='english', ngram_range=ngram_range)
+                       for name in ('pos', 'text')}
+    vectorizers['sem'] = SemanticTfidf(categories, stop_words='english', dtype=dtype)
+
+    blocks = [vectorizers[name].fit_transform(layers[name]) for name in LAYER_ORDER]
+    union = WeightedFeatureUnion([(name, vectorizers[name], weights[name]) for name in LAYER_ORDER], dtype=dtype)
+    return union, blocks
+
+
+def make_booster(boosting_mode, union, svd_components=None, n_estimators=200):
+    if boosting_mode == 'exact':
+        from sklearn.ensemble import GradientBoostingClassifier
+        return GradientBoostingClassifier(n_estimators=n_estimators)
+    if boosting_mode == 'hist':
+        from fake_news_detection.boosting import LayerSVDBoostingClassifier
+        svd_components = dict({'pos': 100, 'text': 300, 'sem': 100}, **(svd_components or {}))
+        return LayerSVDBoostingClassifier(union.layer_sizes(),
+                                          n_components=[svd_components[name] for name, _, _ in union.layers])
+    raise ValueError("boosting_mode must be 'exact' or 'hist', got {!r}".format(boosting_mode))
+
+
+def evaluate_predictions(y_true, y_pred, labels=LABELS):
+    """Accuracy, per-label report and confusion matrix as plain JSON-friendly values."""
+    from sklearn.metrics import classification_report, confusion_matrix
+
+    y_true, y_pred = np.asarray(y_true, dtype=str), np.asarray(y_pred, dtype=str)
+    return {
+        'n_articles': int(len(y_true)),
+        'accuracy': float(np.mean(y_true == y_pred)) if len(y_true) else float('nan'),
+        'report': classification_report(y_true, y_pred, labels=labels, output_dict=True, zero_division=0),
+        'confusion_matrix': {'labels': list(labels),
+                             'matrix': confusion_matrix(y_true, y_pred, labels=labels).tolist()},
+    }
+
+
+def train_model(data, weights=None, layer_k=None, selection_method='chi2', boosting_mode='exact',
+                svd_components=None, test_size=0.2, random_state=42, profiler=None, compact_features=False,
+                memory_budget_mb=256, **layer_kwargs):
+    """Train the production three-layer model on a ``load_dataset`` frame.
+
+    Holds out ``test_size`` of the articles, fits the layer vectorizers,
+    the optional per-layer feature selection (``layer_k``) and the boosting
+    model; ``compact_features`` fits the layers with ``fit_union``'s
+    compact mode. Returns ``(bundle, evaluation, train_hash)``: ``evaluation``
+    scores the model on the held-out articles and ``train_hash`` is the
+    fingerprint ``ModelBundle.save`` records for the training articles.
+    """
+    from sklearn.model_selection import train_test_split
+    from fake_news_detection.bundle import ModelBundle, training_hash
+    from fake_news_detection.selection import LayerSelector
+
+    profiler = profiler or StageProfiler(enabled=False)
+    texts = article_texts(data)
+    y = data[LABEL_COLUMN].astype('str').to_numpy()
+
+    layers, empath_featurizer = build_layers(texts, profiler=profiler, **layer_kwargs)
+    train_rows, test_rows = train_test_split(np.arange(len(texts)), test_size=test_size,
+                                             random_state=random_state)
+    train_layers, test_layers = take_rows(layers, train_rows), take_rows(layers, test_rows)
+    y_train, y_test = y[train_rows], y[test_rows]
+
+    with profiler.stage('vectorize') as stage:
+        union, train_blocks = fit_union(train_layers, empath_featurizer.categories, weights,
+                                        compact=compact_features, memory_budget_mb=memory_budget_mb)
+        stage.count(rows=len(train_rows), features=sum(union.layer_sizes()))
+
+    if layer_k:
+        with profiler.stage('selection') as stage:
+            union, train_blocks = LayerSelector(layer_k, method=selection_method, min_df=2).fit(
+                union, train_blocks, y_train)
+            stage.count(features=sum(union.layer_sizes()))
+
+    X_train = union.combine(train_blocks)
+    classifier = make_booster(boosting_mode, union, svd_components)
+    with profiler.stage('fit/' + boosting_mode) as stage:
+        classifier.fit(stage.count(X_train), y_train)
+
+    bundle = ModelBundle(union, classifier, LABELS, semantic_featurizer=empath_featurizer,
+                         pos_model=layer_kwargs.get('pos_model', 'en'))
+
+    with profiler.stage('evaluate') as stage:
+        X_test = union.transform(test_layers)
+        evaluation = evaluate_predictions(y_test, classifier.predict(stage.count(X_test)))
+
+    return bundle, evaluation, training_hash([texts[i] for i in train_rows], y_train)
+
+
+def learn_online(union, classifier, layers, y, batch_size=None):
+    """Stream ``layers`` through the hashed ``union`` into ``classifier``, ``batch_size`` rows at a time."""
+    from fake_news_detection.online import union_partial_fit_transform
+
+    n_rows = len(y)
+    batch_size = batch_size or n_rows
+    for start in range(0, n_rows, batch_size):
+        rows = np.arange(start, min(start + batch_size, n_rows))
+        classifier.partial_fit(union_partial_fit_transform(union, take_rows(layers, rows)), y[rows])
+
+
+def train_online_model(data, classifier='sgd', n_features=2 ** 20, weights=None, batch_size=None,
+                       test_size=0.2, random_state=42, profiler=None, **layer_kwargs):
+    """Train an incrementally updatable model on a ``load_dataset`` frame.
+
+    Same layers and held-out evaluation as ``train_model``, but the text
+    and POS layers are hashed, every layer keeps running document
+    frequencies and ``classifier`` (see ``make_online_classifier``) learns
+    with ``partial_fit``, so ``update_model`` can later add new articles
+    without a retrain. Returns ``(bundle, evaluation, train_hash)``.
+    """
+    from sklearn.model_selection import train_test_split
+    from fake_news_detection.bundle import ModelBundle, training_hash
+    from fake_news_detection.online import OnlineClassifier, make_online_classifier, online_union
+
+    profiler = profiler or StageProfiler(enabled=False)
+    texts = article_texts(data)
+    y = data[LABEL_COLUMN].astype('str').to_numpy()
+
+    layers, empath_featurizer = build_layers(texts, profiler=profiler, **layer_kwargs)
+    train_rows, test_rows = train_test_split(np.arange(len(texts)), test_size=test_size,
+                                             random_state=random_state)
+
+    weights = dict(LAYER_WEIGHTS, **(weights or {}))
+    union = online_union(empath_featurizer.categories, [(name, weights[name]) for name in LAYER_ORDER], n_features)
+    online_classifier = OnlineClassifier(make_online_classifier(classifier, random_state), LABELS)
+
+    with profiler.stage('fit/online/' + classifier) as stage:
+        learn_online(union, online_classifier, take_rows(layers, train_rows), y[train_rows], batch_size)
+        stage.count(rows=len(train_rows), features=sum(union.layer_sizes()))
+
+    bundle = ModelBundle(union, online_classifier, LABELS, semantic_featurizer=empath_featurizer,
+                         pos_model=layer_kwargs.get('pos_model', 'en'))
+
+    with profiler.stage('evaluate') as stage:
+        X_test = union.transform(take_rows(layers, test_rows))
+        evaluation = evaluate_predictions(y[test_rows], online_classifier.predict(stage.count(X_test)))
+
+    return bundle, evaluation, training_hash([texts[i] for i in train_rows], y[train_rows])
+
+
+def update_model(bundle, data, batch_size=None, profiler=None, **layer_kwargs):
+    """Add a batch of labelled articles to a model from ``train_online_model``.
+
+    Only the batch is featurized and learned, so the cost grows with the
+    batch and not with everything the model has seen. The batch is scored
+    before the model learns from it; that evaluation is returned with the
+    updated bundle and its chained training fingerprint as
+    ``(bundle, evaluation, train_hash)``.
+    """
+    from fake_news_detection.bundle import training_hash
+    from fake_news_detection.online import OnlineClassifier
+
+    if not isinstance(bundle.classifier, OnlineClassifier):
+        raise ValueError('{} cannot be updated, train it with --online'.format(
+            type(bundle.classifier).__name__))
+
+    profiler = profiler or StageProfiler(enabled=False)
+    texts = article_texts(data)
+    y = data[LABEL_COLUMN].astype('str').to_numpy()
+
+    layer_kwargs.setdefault('pos_model', bundle.pos_model)
+    layers, _ = build_layers(texts, empath_featurizer=bundle.semantic_featurizer, profiler=profiler,
+                             **layer_kwargs)
+
+    with profiler.stage('evaluate') as stage:
+        X = bundle.union.transform(layers)
+        evaluation = evaluate_predictions(y, bundle.classifier.predict(stage.count(X)), bundle.labels)
+
+    with profiler.stage('update') as stage:
+        learn_online(bundle.union, bundle.classifier, layers, y, batch_size)
+        stage.count(rows=len(y))
+
+    previous = (bundle.manifest or {}).get('training_hash')
+    return bundle, evaluation, training_hash(texts, y, previous=previous)
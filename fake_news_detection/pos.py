@@ -0,0 +1,44 @@
+UNUSED_COMPONENTS = [
+    'parser', 'ner', 'lemmatizer', 'senter', 'entity_ruler', 'entity_linker',
+    'textcat', 'textcat_multilabel', 'spancat', 'trainable_lemmatizer',
+]
+
+
+def load_pos_pipeline(model='en'):
+    """Load a spaCy pipeline with every component ``token.pos_`` doesn't need disabled."""
+    import spacy
+    return spacy.load(model, disable=UNUSED_COMPONENTS)
+
+
+class POSTagger:
+    """Turns articles into space separated coarse POS tags (the ``POS_text`` layer).
+
+    Texts are streamed through ``nlp.pipe`` so the same tagger can be used
+    for the training corpus and for incoming articles at prediction time.
+    """
+
+    def __init__(self, nlp=None, model='en', batch_size=256, n_process=1):
+        self._nlp = nlp
+        self.model = model
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+    @property
+    def nlp(self):
+        # Loaded on first use, so fully cached runs never pay for spaCy
+        if self._nlp is None:
+            self._nlp = load_pos_pipeline(self.model)
+        return self._nlp
+
+    @staticmethod
+    def _doc_to_tags(doc):
+        return ' '.join([token.pos_ for token in doc])
+
+    def tag(self, text):
+        return self._doc_to_tags(self.nlp(text))
+
+    __call__ = tag
+
+    def tag_many(self, texts):
+        docs = self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+        return [self._doc_to_tags(doc) for doc in docs]
@@ -0,0 +1,157 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import cProfile
+import datetime
+import platform
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger('fake_news_detection.profiling')
+
+
+def peak_rss_mb():
+    """High-water resident set size of this process so far, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def rss_mb():
+    """Current resident set size, read from /proc where available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Stage:
+    """Measurements of one profiled stage; ``count`` records the size of its output."""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.record = {'stage': name, 'parent': parent}
+
+    def count(self, result=None, rows=None, features=None):
+        """Record row and feature counts, from ``result``'s shape or length if given.
+
+        Returns ``result``, so an expression can be counted in place.
+        """
+        if result is not None:
+            shape = getattr(result, 'shape', None)
+            if shape is not None:
+                rows = shape[0] if rows is None else rows
+                if len(shape) > 1 and features is None:
+                    features = shape[1]
+            elif rows is None:
+                rows = len(result)
+        if rows is not None:
+            self.record['rows'] = int(rows)
+        if features is not None:
+            self.record['features'] = int(features)
+        return result
+
+    def set(self, **values):
+        self.record.update(values)
+
+
+class StageProfiler:
+    """Wall time, CPU time and memory of every pipeline stage in one run report.
+
+    Each ``with profiler.stage(name) as stage:`` block records its wall and
+    CPU time, the current and high-water RSS and, with ``trace_memory``, the
+    peak of Python-tracked allocations (NumPy arrays included) inside the
+    block. With ``profile_dir`` every top-level stage also writes a cProfile
+    dump ``<profile_dir>/<stage>.prof``. Nothing is printed: finished stages
+    are logged at DEBUG level on ``fake_news_detection.profiling`` and
+    ``write`` saves the JSON report. ``enabled=False`` turns every stage
+    into a no-op.
+    """
+
+    def __init__(self, enabled=True, trace_memory=False, profile_dir=None):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self._stack = []
+        self._peaks = []
+        self._started_tracing = False
+
+    def _profile_path(self, name):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        return os.path.join(self.profile_dir, re.sub(r'[^\w.-]+', '_', name) + '.prof')
+
+    @contextmanager
+    def stage(self, name, **values):
+        stage = Stage(name, self._stack[-1].name if self._stack else None)
+        stage.set(**values)
+        if not self.enabled:
+            yield stage
+            return
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            # tracemalloc has a single peak: fold it into the enclosing stage's
+            # running maximum before resetting it for this one
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+        # cProfile cannot nest, only top-level stages are profiled
+        profiler = cProfile.Profile() if self.profile_dir and not self._stack else None
+
+        self._stack.append(stage)
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield stage
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self._stack.pop()
+
+            stage.set(wall_seconds=wall, cpu_seconds=cpu, rss_mb=rss_mb(), peak_rss_mb=peak_rss_mb())
+            if self.trace_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                stage.set(traced_peak_mb=peak / 2 ** 20)
+            if profiler is not None:
+                path = self._profile_path(name)
+                profiler.dump_stats(path)
+                stage.set(profile=path)
+
+            self.stages.append(stage.record)
+            logger.debug('%s: %.3fs wall, %.3fs cpu', name, wall, cpu)
+
+    def report(self):
+        return {
+            'started': self.started,
+            'python': platform.python_version(),
+            'total_seconds': sum(record.get('wall_seconds', 0.0) for record in self.stages
+                                 if record['parent'] is None),
+            'stages': self.stages,
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return path
@@ -0,0 +1,33 @@
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'omw-1.4': 'corpora/omw-1.4',
+    'words': 'corpora/words',
+}
+
+
+def missing_nltk_resources(names=('stopwords', 'wordnet')):
+    import nltk
+
+    missing = []
+    for name in names:
+        try:
+            nltk.data.find(NLTK_RESOURCES.get(name, name))
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def ensure_nltk_resources(names=('stopwords', 'wordnet'), quiet=True):
+    """Download the NLTK resources in ``names`` that are not installed yet.
+
+    Installed resources are only looked up, so calling this on every start
+    costs no network round trip. Returns the names that were downloaded.
+    """
+    import nltk
+
+    missing = missing_nltk_resources(names)
+    for name in missing:
+        if not nltk.download(name, quiet=quiet):
+            raise LookupError('Could not download the NLTK resource {!r}'.format(name))
+    return missing
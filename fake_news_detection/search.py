@@ -0,0 +1,204 @@
+import os
+import json
+import math
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+
+def _evaluate(estimator, params, resource, amount, fold):
+    X_train, y_train, X_valid, y_valid = fold
+    estimator = clone(estimator).set_params(**params)
+
+    if resource == 'n_samples':
+        # Fold training rows are stored pre-shuffled, so a prefix is a random subsample
+        X_train, y_train = X_train[:amount], y_train[:amount]
+    else:
+        estimator.set_params(**{resource: amount})
+
+    try:
+        estimator.fit(X_train, y_train)
+        return estimator.score(X_valid, y_valid), None
+    except Exception as error:
+        return np.nan, '{}: {}'.format(type(error).__name__, error)
+
+
+class _Search:
+    def __init__(self, model, feature_set, estimator, candidates, resource, max_resource, factor):
+        self.model = model
+        self.feature_set = feature_set
+        self.estimator = estimator
+        self.candidates = candidates
+        self.resource = resource
+        self.max_resource = max_resource
+        self.factor = factor
+        # Halve until at most ``factor`` candidates are left for the full budget
+        self.n_rungs = 1
+        remaining = len(candidates)
+        while remaining > factor:
+            remaining = math.ceil(remaining / factor)
+            self.n_rungs += 1
+        self.rung = 0
+        self.history = []
+        self.errors = {}
+        self.best = None
+
+    @property
+    def key(self):
+        return '{}/{}'.format(self.model, self.feature_set)
+
+    def amount(self):
+        shrink = self.factor ** (self.n_rungs - 1 - self.rung)
+        return max(1, int(self.max_resource // shrink))
+
+    def advance(self, scores, errors=()):
+        """Keep the best 1/factor of the candidates given their mean fold scores.
+
+        ``errors`` holds the first fit error of every candidate (None if all
+        its folds fitted); failed candidates score NaN and are ranked last.
+        """
+        scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=-np.inf)
+        order = np.argsort(-scores, kind='stable')
+        failed = [{'params': self.candidates[i], 'error': error} for i, error in enumerate(errors) if error]
+        self.history.append({
+            'rung': self.rung,
+            'resource': self.amount(),
+            'n_candidates': len(self.candidates),
+            'n_failed': len(failed),
+            'best_score': float(scores[order[0]]),
+        })
+        if failed:
+            self.errors[self.rung] = failed
+
+        self.rung += 1
+        if not np.isfinite(scores[order[0]]):
+            # Every candidate failed: nothing to keep or to store
+            self.best = {'params': None, 'score': float('nan')}
+            return False
+        if self.rung >= self.n_rungs:
+            self.best = {'params': self.candidates[order[0]], 'score': float(scores[order[0]])}
+            return False
+
+        keep = max(1, math.ceil(len(self.candidates) / self.factor))
+        self.candidates = [self.candidates[i] for i in order[:keep]]
+        return True
+
+
+class SearchOrchestrator:
+    """Runs every model x feature set hyper-parameter search from one job queue.
+
+    Feature sets are split into cross-validation folds once when they are
+    added and every search reuses those fold matrices. Each search is a
+    successive halving over randomly sampled candidates: all candidates are
+    scored on a small budget (training rows by default, or any numeric
+    parameter such as ``n_estimators``) and only the best ``1 / factor``
+    move on to the next, ``factor`` times larger budget. All searches'
+    (candidate, fold) fits for a rung go to a single joblib pool.
+    """
+
+    def __init__(self, cv=5, factor=3, n_jobs=-1, random_state=42):
+        self.cv = cv
+        self.factor = factor
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.folds = {}
+        self.searches = []
+
+    def add_feature_set(self, name, X, y):
+        X = X.tocsr() if hasattr(X, 'tocsr') else X
+        y = np.asarray(y)
+        rng = np.random.RandomState(self.random_state)
+        folds = []
+
+        for train, valid in StratifiedKFold(self.cv).split(np.zeros(len(y)), y):
+            train = rng.permutation(train)
+            folds.append((X[train], y[train], X[valid], y[valid]))
+
+        self.folds[name] = folds
+
+    def add_search(self, model, feature_set, estimator, param_distributions,
+                   n_candidates=10, resource='n_samples', max_resource=None):
+        if feature_set not in self.folds:
+            raise KeyError('Unknown feature set {!r}, call add_feature_set first'.format(feature_set))
+
+        if max_resource is None:
+            if resource != 'n_samples':
+                raise ValueError('max_resource is required when the budget is {!r}'.format(resource))
+            max_resource = min(fold[0].shape[0] for fold in self.folds[feature_set])
+
+        candidates = list(ParameterSampler(param_distributions, n_candidates, random_state=self.random_state))
+        self.searches.append(_Search(model, feature_set, estimator, candidates, resource,
+                                     max_resource, self.factor))
+
+    def run(self, results_path=None):
+        active = list(self.searches)
+
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            while active:
+                tasks = [(search, i, fold)
+                         for search in active
+                         for i in range(len(search.candidates))
+                         for fold in self.folds[search.feature_set]]
+
+                scores = parallel(
+                    delayed(_evaluate)(search.estimator, search.candidates[i], search.resource,
+                                       search.amount(), fold)
+                    for search, i, fold in tasks
+                )
+
+                fold_scores, fold_errors = {}, {}
+                for (search, i, _), (score, error) in zip(tasks, scores):
+                    fold_scores.setdefault(id(search), [[] for _ in search.candidates])[i].append(score)
+                    errors = fold_errors.setdefault(id(search), [None] * len(search.candidates))
+                    errors[i] = errors[i] or error
+
+                active = [search for search in active
+                          if search.advance([np.mean(s) for s in fold_scores[id(search)]], fold_errors[id(search)])]
+
+        results = {search.key: dict(search.best, history=search.history, errors=search.errors)
+                   for search in self.searches}
+        if results_path is not None:
+            # A search without a single successful candidate keeps the stored parameters
+            save_best_params({key: result for key, result in results.items() if np.isfinite(result['score'])},
+                             results_path)
+        return results
+
+
+def _to_builtin(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def save_best_params(results, path):
+    existing = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            existing = json.load(f)
+    existing.update(results)
+
+    with open(path, 'w') as f:
+        json.dump(existing, f, indent=2, default=_to_builtin)
+
+
+class BestParams:
+    """Reads the parameters written by ``SearchOrchestrator.run``.
+
+    ``get`` returns the given defaults updated with the stored best
+    parameters, so the tuned constructors keep working before the first
+    search has been run.
+    """
+
+    def __init__(self, path):
+        self.results = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.results = json.load(f)
+
+    def update(self, results):
+        """Use the successful searches of ``SearchOrchestrator.run`` results from now on."""
+        self.results.update({key: result for key, result in results.items() if np.isfinite(result['score'])})
+
+    def get(self, model, feature_set, **defaults):
+        stored = self.results.get('{}/{}'.format(model, feature_set), {})
+        return dict(defaults, **stored.get('params', {}))
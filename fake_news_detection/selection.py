@@ -0,0 +1,112 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_selection import chi2
+
+from fake_news_detection.union import WeightedFeatureUnion, feature_names
+
+
+def document_frequency(X):
+    X = sp.csc_matrix(X)
+    return np.diff(X.indptr)
+
+
+def presence_mutual_info(X, y):
+    """Mutual information between every column's presence (non-zero) and the label."""
+    X = sp.csr_matrix(X)
+    classes, y = np.unique(np.asarray(y), return_inverse=True)
+    Y = sp.csr_matrix((np.ones(len(y)), (np.arange(len(y)), y)), shape=(len(y), len(classes)))
+
+    n = float(X.shape[0])
+    present = np.asarray((Y.T @ (X > 0).astype(np.float64)).todense())
+    class_total = np.asarray(Y.sum(axis=0)).T
+    absent = class_total - present
+
+    mutual_info = np.zeros(X.shape[1])
+    for joint in (present, absent):
+        marginal = joint.sum(axis=0, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = joint / n * np.log(joint * n / (marginal * class_total))
+        mutual_info += np.nan_to_num(terms).sum(axis=0)
+    return mutual_info
+
+
+def column_scores(X, y, method):
+    if method == 'chi2':
+        scores, _ = chi2(X, y)
+    elif method == 'mutual_info':
+        scores = presence_mutual_info(X, y)
+    elif method == 'df':
+        scores = document_frequency(X)
+    else:
+        raise ValueError("method must be 'chi2', 'mutual_info' or 'df', got {!r}".format(method))
+    return np.nan_to_num(np.asarray(scores, dtype=np.float64))
+
+
+def select_columns(X, y, k, method='chi2', min_df=1):
+    """Indices (ascending) of the ``k`` best columns of ``X``.
+
+    ``k=None`` keeps every column. Otherwise columns present in fewer than
+    ``min_df`` documents are dropped before scoring.
+    """
+    if k is None:
+        return np.arange(X.shape[1])
+    candidates = np.flatnonzero(document_frequency(X) >= min_df)
+    if k >= len(candidates):
+        return candidates
+
+    scores = column_scores(sp.csr_matrix(X)[:, candidates], y, method)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return np.sort(candidates[best])
+
+
+class SelectedVectorizer:
+    """A fitted vectorizer restricted to a subset of its output columns."""
+
+    def __init__(self, vectorizer, columns):
+        self.vectorizer = vectorizer
+        self.columns = np.asarray(columns, dtype=np.intp)
+
+    @property
+    def n_features_(self):
+        return len(self.columns)
+
+    def transform(self, X):
+        return sp.csr_matrix(self.vectorizer.transform(X))[:, self.columns]
+
+    def get_feature_names_out(self):
+        names = feature_names(self.vectorizer)
+        return [names[i] for i in self.columns]
+
+
+class LayerSelector:
+    """Feature selection between the layer vectorizers and the tree models.
+
+    ``k`` maps a layer name to the number of columns to keep (``None`` or a
+    missing layer keeps all of them, ``min_df`` included); ``method`` is ``'chi2'``,
+    ``'mutual_info'`` or ``'df'`` (document frequency pruning). ``fit``
+    returns the selected training blocks and a new ``WeightedFeatureUnion``
+    whose vectorizers only emit the selected columns, so the selection is
+    saved together with the model.
+    """
+
+    def __init__(self, k, method='chi2', min_df=1):
+        self.k = k
+        self.method = method
+        self.min_df = min_df
+
+    def fit(self, union, blocks, y):
+        layers, selected_blocks = [], []
+        self.columns_ = {}
+
+        for (name, vectorizer, weight), block in zip(union.layers, blocks):
+            columns = select_columns(block, y, self.k.get(name), self.method, self.min_df)
+            self.columns_[name] = columns
+            layers.append((name, SelectedVectorizer(vectorizer, columns), weight))
+            selected_blocks.append(sp.csr_matrix(block)[:, columns])
+
+        return WeightedFeatureUnion(layers, union.dtype, union.chunk_rows), selected_blocks
+
+    def transform(self, union, blocks):
+        """Select the same columns from already vectorized blocks (e.g. the test split)."""
+        return [sp.csr_matrix(block)[:, self.columns_[name]]
+                for (name, _, _), block in zip(union.layers, blocks)]
@@ -0,0 +1,89 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import (
+    ENGLISH_STOP_WORDS, CountVectorizer, TfidfTransformer,
+)
+
+
+class EmpathFeaturizer:
+    """Empath category counts for a whole corpus as one sparse matrix.
+
+    The lexicon is turned into a word -> category matrix once, so the counts
+    ``lexicon.analyze(text, normalize=False)`` would return for every text
+    come out of a single product with the document-term count matrix.
+    Columns follow the order of ``categories``.
+    """
+
+    def __init__(self, lexicon=None):
+        if lexicon is None:
+            from empath import Empath
+            lexicon = Empath()
+
+        self.categories = list(lexicon.cats.keys())
+
+        vocabulary = {}
+        rows, cols = [], []
+        for j, category in enumerate(self.categories):
+            for term in lexicon.cats[category]:
+                rows.append(vocabulary.setdefault(term, len(vocabulary)))
+                cols.append(j)
+
+        # Duplicate (term, category) pairs are summed, as analyze counts them twice
+        self.term_category = sp.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(vocabulary), len(self.categories)),
+        )
+        # Empath's default tokenizer is a case sensitive whitespace split
+        self.term_counter = CountVectorizer(vocabulary=vocabulary, analyzer=str.split)
+
+    def transform(self, texts):
+        """Return a CSR (n_texts, n_categories) matrix of category counts."""
+        doc_term = self.term_counter.transform(texts)
+        return (doc_term @ self.term_category).tocsr()
+
+    def analyze(self, text):
+        counts = self.transform([text]).toarray()[0]
+        return dict(zip(self.categories, counts))
+
+
+class SemanticTfidf:
+    """TF-IDF over Empath category counts.
+
+    Produces the same features as ``TfidfVectorizer(stop_words='english')``
+    fitted on the old ``semantics_text`` strings (category names repeated
+    once per hit) without ever building those strings.
+    """
+
+    def __init__(self, categories, stop_words='english', dtype=np.float64, **tfidf_params):
+        if stop_words == 'english':
+            stop_words = ENGLISH_STOP_WORDS
+        self.categories = list(categories)
+        self.stop_words = frozenset(stop_words or ())
+        self.dtype = dtype
+        self.transformer = TfidfTransformer(**tfidf_params)
+
+    def fit(self, counts):
+        counts = sp.csr_matrix(counts)
+        document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+
+        kept = [j for j, category in enumerate(self.categories)
+                if document_frequency[j] > 0 and category not in self.stop_words]
+        kept.sort(key=lambda j: self.categories[j])
+
+        self.columns_ = np.asarray(kept, dtype=np.intp)
+        self.transformer.fit(counts[:, self.columns_])
+        return self
+
+    def transform(self, counts):
+        # Bundles pickled before ``dtype`` existed keep float64
+        dtype = getattr(self, 'dtype', np.float64)
+        counts = sp.csr_matrix(counts)[:, self.columns_].astype(dtype, copy=False)
+        return self.transformer.transform(counts)
+
+    def fit_transform(self, counts):
+        return self.fit(counts).transform(counts)
+
+    def get_feature_names(self):
+        return [self.categories[j] for j in self.columns_]
+
+    get_feature_names_out = get_feature_names
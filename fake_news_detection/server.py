@@ -0,0 +1,211 @@
+"""Local HTTP server for the three-layer model.
+
+    python -m fake_news_detection.server --model three_layer_model --port 8000
+
+    POST /predict  {"text": "..."} or {"texts": ["...", ...]}
+    GET  /stats    request counters, throughput and p50/p99 latency
+    GET  /health
+"""
+
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+
+import numpy as np
+
+
+class LatencyStats:
+    """Counters and a window of recent request latencies."""
+
+    def __init__(self, window=10000):
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.articles = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record_request(self, seconds, n_articles):
+        self.requests += 1
+        self.articles += n_articles
+        self.latencies.append(seconds)
+
+    def record_batch(self):
+        self.batches += 1
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        latencies = np.asarray(self.latencies) * 1000.0
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            'uptime_s': uptime,
+            'requests': self.requests,
+            'articles': self.articles,
+            'batches': self.batches,
+            'errors': self.errors,
+            'mean_batch_size': self.articles / self.batches if self.batches else 0.0,
+            'throughput_rps': self.requests / uptime if uptime else 0.0,
+            'throughput_articles_ps': self.articles / uptime if uptime else 0.0,
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+        }
+
+
+class MicroBatcher:
+    """Groups concurrent prediction requests into batches.
+
+    A batch is sent to the predictor as soon as ``max_batch_size`` articles
+    are waiting or the oldest one has waited ``max_wait_ms``. Prediction
+    runs in a worker thread so the event loop keeps accepting requests.
+    """
+
+    def __init__(self, predictor, stats, max_batch_size=32, max_wait_ms=10):
+        self.predictor = predictor
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+
+    async def predict(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                results = await loop.run_in_executor(None, self.predictor.predict, texts)
+            except Exception as error:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            self.stats.record_batch()
+            start = 0
+            for request_texts, future in pending:
+                if not future.done():
+                    future.set_result(results[start:start + len(request_texts)])
+                start += len(request_texts)
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+
+class PredictionServer:
+    def __init__(self, predictor, max_batch_size=32, max_wait_ms=10):
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(predictor, self.stats, max_batch_size, max_wait_ms)
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        head = 'HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n'.format(
+            status, REASONS[status], len(body), 'keep-alive' if keep_alive else 'close')
+        writer.write(head.encode('ascii') + body)
+        await writer.drain()
+
+    async def _route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats.snapshot()
+        if method != 'POST' or path != '/predict':
+            return 404, {'error': 'unknown endpoint {} {}'.format(method, path)}
+
+        try:
+            request = json.loads(body or b'{}')
+            texts = request['texts'] if 'texts' in request else [request['text']]
+            if not isinstance(texts, list) or not texts:
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': 'expected {"text": ...} or {"texts": [...]}'}
+
+        start = time.perf_counter()
+        results = await self.batcher.predict([str(text) for text in texts])
+        self.stats.record_request(time.perf_counter() - start, len(texts))
+
+        if 'texts' in request:
+            return 200, {'predictions': results}
+        return 200, results[0]
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as error:
+                    self.stats.errors += 1
+                    status, payload = 500, {'error': str(error)}
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        batcher = asyncio.ensure_future(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the three-layer fake news model over HTTP')
+    parser.add_argument('--model', default='three_layer_model', help='bundle directory written by ModelBundle.save')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    args = parser.parse_args(argv)
+
+    from fake_news_detection.inference import Predictor
+
+    predictor = Predictor.from_directory(args.model)
+    server = PredictionServer(predictor, args.max_batch_size, args.max_wait_ms)
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
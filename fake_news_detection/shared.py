@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+
+CSR_PARTS = ('data', 'indices', 'indptr')
+
+
+def save_csr(X, directory, name):
+    """Write the arrays of CSR ``X`` as ``<directory>/<name>.<part>.npy``; returns the handle ``load_csr`` takes.
+
+    The handle only holds paths and the shape, so it pickles in a few bytes.
+    """
+    X = sp.csr_matrix(X)
+    os.makedirs(directory, exist_ok=True)
+    handle = {'shape': tuple(int(n) for n in X.shape)}
+    for part in CSR_PARTS:
+        path = os.path.join(directory, '{}.{}.npy'.format(name, part))
+        np.save(path, getattr(X, part))
+        handle[part] = path
+    return handle
+
+
+def load_csr(handle, mmap_mode='c'):
+    """The CSR matrix of a ``save_csr`` handle, its arrays memory-mapped.
+
+    Every process mapping the same files shares their pages. The default
+    copy-on-write mode lets estimators that sort indices in place do so
+    without touching the files or the other processes' view.
+    """
+    arrays = tuple(np.load(handle[part], mmap_mode=mmap_mode) for part in CSR_PARTS)
+    return sp.csr_matrix(arrays, shape=tuple(handle['shape']), copy=False)
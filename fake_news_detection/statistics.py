@@ -0,0 +1,99 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+CLOUD_TOKEN = re.compile(r"\w[\w']*")
+
+
+def cloud_tokens(text):
+    """Tokens as ``WordCloud.generate`` splits them: no trailing 's and no numbers."""
+    words = CLOUD_TOKEN.findall(text)
+    words = [word[:-2] if word.lower().endswith("'s") else word for word in words]
+    return [word for word in words if not word.isdigit()]
+
+
+def fuse_cases_and_plurals(counts, normalize_plurals=True):
+    """Merge case variants (kept in their most common form) and simple plurals.
+
+    The same normalization ``WordCloud`` applies to a list of tokens, done
+    on already aggregated counts.
+    """
+    cases = {}
+    for word, count in counts.items():
+        cases.setdefault(word.lower(), {})[word] = count
+
+    if normalize_plurals:
+        for key in list(cases):
+            if key.endswith('s') and not key.endswith('ss') and key[:-1] in cases:
+                singular = cases[key[:-1]]
+                for word, count in cases.pop(key).items():
+                    singular[word[:-1]] = singular.get(word[:-1], 0) + count
+
+    return {max(variants.items(), key=lambda item: item[1])[0]: sum(variants.values())
+            for variants in cases.values()}
+
+
+class LabelTermStats:
+    """Term frequencies of every label, gathered in a single pass.
+
+    ``from_texts`` streams the documents once and updates one ``Counter``
+    per label, so no per-label string is ever built; ``from_counts`` takes
+    the per-label column sums of a sparse count matrix (e.g. the Empath
+    counts). ``top`` feeds the frequency bar plots and ``frequencies`` the
+    word clouds.
+    """
+
+    def __init__(self, counters):
+        self.counters = counters
+
+    @classmethod
+    def from_texts(cls, texts, labels, analyzer=str.split):
+        counters = {}
+        for text, label in zip(texts, labels):
+            counter = counters.get(label)
+            if counter is None:
+                counter = counters[label] = Counter()
+            counter.update(analyzer(text))
+        return cls(counters)
+
+    @classmethod
+    def from_counts(cls, counts, labels, feature_names):
+        counts = sp.csr_matrix(counts)
+        classes, rows = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        Y = sp.csr_matrix((np.ones(len(rows)), (rows, np.arange(len(rows)))), shape=(len(classes), len(rows)))
+        sums = (Y @ counts).toarray()
+
+        counters = {}
+        for label, row in zip(classes, sums):
+            nonzero = np.flatnonzero(row)
+            counters[label] = Counter({feature_names[j]: row[j].item() for j in nonzero})
+        return cls(counters)
+
+    @property
+    def labels(self):
+        return list(self.counters)
+
+    def frequencies(self, label, stop_words=(), word_cloud=False):
+        """Term -> count for ``label``, without ``stop_words`` (compared lower-case).
+
+        With ``word_cloud`` the result is normalized like ``WordCloud.generate``
+        does (case variants and plurals fused, its default stop words removed
+        when none are given), ready for ``generate_from_frequencies``.
+        """
+        if word_cloud and not stop_words:
+            from wordcloud import STOPWORDS
+            stop_words = STOPWORDS
+        stop_words = {word.lower() for word in stop_words}
+
+        counts = {word: count for word, count in self.counters.get(label, Counter()).items()
+                  if word.lower() not in stop_words}
+        return fuse_cases_and_plurals(counts) if word_cloud else counts
+
+    def top(self, label, n=20):
+        """The ``n`` most frequent terms of ``label`` as a Word/Frequency frame."""
+        most_common = self.counters.get(label, Counter()).most_common(n)
+        return pd.DataFrame(most_common, columns=['Word', 'Frequency'])
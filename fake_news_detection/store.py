@@ -0,0 +1,256 @@
+import os
+import re
+import json
+import glob
+import uuid
+import pickle
+import shutil
+import hashlib
+import datetime
+from functools import cached_property
+
+import numpy as np
+import scipy.sparse as sp
+
+from fake_news_detection.shared import CSR_PARTS, load_csr, save_csr
+
+
+META_FILE = 'meta.json'
+VECTORIZER_FILE = 'vectorizer.pkl'
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(item) for item in value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, type):
+        return value.__name__
+    return repr(value)
+
+
+def vectorizer_config(vectorizer):
+    """The class and constructor parameters of ``vectorizer``, in a stable JSON form."""
+    if hasattr(vectorizer, 'get_params'):
+        params = vectorizer.get_params()
+    else:
+        params = {name: value for name, value in vars(vectorizer).items()
+                  if not name.endswith('_') and not name.startswith('_')}
+    return {'class': type(vectorizer).__name__, 'params': _canonical(params)}
+
+
+def content_hash(*parts):
+    """Fingerprint of texts, label arrays (with their row index) and sparse matrices."""
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        if sp.issparse(part):
+            part = sp.csr_matrix(part)
+            digest.update(repr(part.shape).encode('ascii'))
+            for array in (part.data, part.indices, part.indptr):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            continue
+        # pandas objects have an index; list.index is a method
+        if hasattr(part, 'index') and not callable(part.index):
+            digest.update(np.asarray(part.index).tobytes())
+        for value in part:
+            digest.update(str(value).encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(b'\1')
+    return digest.hexdigest()
+
+
+def _rows(y):
+    return np.asarray(y.index) if hasattr(y, 'index') and not callable(y.index) else None
+
+
+class StoredLayer:
+    """One feature store entry; every array is memory-mapped on first access.
+
+    ``train`` and ``test`` are CSR matrices, ``y_train`` / ``y_test`` the
+    labels and ``train_rows`` / ``test_rows`` the dataset rows of the split
+    (None when the labels had no index). ``vectorizer`` unpickles the
+    fitted vectorizer, so only the callers that need it pay for it.
+    """
+
+    def __init__(self, path, cached=True):
+        self.path = path
+        self.cached = cached
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @cached_property
+    def meta(self):
+        with open(self._file(META_FILE)) as f:
+            return json.load(f)
+
+    @property
+    def key(self):
+        return self.meta['key']
+
+    def _array(self, name):
+        path = self._file(name + '.npy')
+        return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+    def handle(self, name):
+        """The ``load_csr`` handle of the ``'train'`` or ``'test'`` matrix, e.g. for ``ModelZoo.add_feature_set``."""
+        handle = {part: self._file('{}.{}.npy'.format(name, part)) for part in CSR_PARTS}
+        return dict(handle, shape=tuple(self.meta['shapes'][name]))
+
+    def _csr(self, name):
+        return load_csr(self.handle(name))
+
+    @cached_property
+    def train(self):
+        return self._csr('train')
+
+    @cached_property
+    def test(self):
+        return self._csr('test')
+
+    @cached_property
+    def y_train(self):
+        return self._array('y_train')
+
+    @cached_property
+    def y_test(self):
+        return self._array('y_test')
+
+    @cached_property
+    def train_rows(self):
+        return self._array('train_rows')
+
+    @cached_property
+    def test_rows(self):
+        return self._array('test_rows')
+
+    @cached_property
+    def vectorizer(self):
+        if not os.path.exists(self._file(VECTORIZER_FILE)):
+            return None
+        with open(self._file(VECTORIZER_FILE), 'rb') as f:
+            return pickle.load(f)
+
+
+class FeatureStore:
+    """Train/test feature matrices on disk, keyed by how they were built.
+
+    Each entry is a directory of uncompressed ``.npy`` arrays (the CSR
+    parts of both matrices, the labels and the split rows) plus the pickled
+    fitted vectorizer and a ``meta.json``. The key hashes the entry name,
+    the vectorizer configuration and a snapshot of the input data (by
+    default a hash of the inputs themselves), so changing any of them
+    builds a new entry. Entries are reopened by memory-mapping the arrays,
+    without parsing or unpickling anything, and can be shared by any
+    number of processes.
+
+    Every entry is a full copy of its matrices, so old ones pile up as the
+    data or the configuration changes. With ``keep`` set, building an entry
+    deletes all but the ``keep`` most recently used entries of the same
+    name; ``prune`` does the same for every name on demand.
+    """
+
+    def __init__(self, directory, keep=None):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, name, key):
+        return os.path.join(self.directory, '{}-{}'.format(re.sub(r'[^\w.-]+', '_', name), key[:20]))
+
+    def get_or_build(self, name, config, snapshot, build, y_train, y_test):
+        """Open the entry for ``(name, config, snapshot)``, calling ``build`` only when it is missing.
+
+        ``build`` returns ``(train, test, vectorizer)``; ``vectorizer`` may be None.
+        """
+        key = hashlib.sha256(json.dumps([name, _canonical(config), snapshot]).encode('utf-8')).hexdigest()
+        path = self._path(name, key)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            # The modification time of meta.json records the last use, for ``open`` and ``prune``
+            os.utime(os.path.join(path, META_FILE))
+            return StoredLayer(path, cached=True)
+
+        train, test, vectorizer = build()
+
+        # Written to a temporary directory first, so readers never see a partial entry
+        staging = os.path.join(self.directory, '.staging-{}'.format(uuid.uuid4().hex))
+        os.makedirs(staging)
+        meta = {
+            'name': name,
+            'key': key,
+            'config': _canonical(config),
+            'snapshot': snapshot,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'shapes': {
+                'train': save_csr(train, staging, 'train')['shape'],
+                'test': save_csr(test, staging, 'test')['shape'],
+            },
+        }
+        for array_name, values in [('y_train', y_train), ('y_test', y_test),
+                                   ('train_rows', _rows(y_train)), ('test_rows', _rows(y_test))]:
+            if values is not None:
+                values = np.asarray(values, dtype=str if array_name.startswith('y_') else None)
+                np.save(os.path.join(staging, array_name + '.npy'), values)
+        if vectorizer is not None:
+            with open(os.path.join(staging, VECTORIZER_FILE), 'wb') as f:
+                pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with open(os.path.join(staging, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(staging, ignore_errors=True)
+        if self.keep is not None:
+            self.prune(self.keep, names=[name])
+        return StoredLayer(path, cached=False)
+
+    def layer(self, name, vectorizer, X_train, X_test, y_train, y_test, snapshot=None):
+        """Fit ``vectorizer`` on ``X_train`` and transform both splits, or reopen the stored result.
+
+        A reopened entry hands back its own fitted vectorizer as
+        ``.vectorizer``; ``vectorizer`` itself is then left unfitted.
+        """
+        if snapshot is None:
+            snapshot = content_hash(X_train, X_test, y_train, y_test)
+
+        def build():
+            return vectorizer.fit_transform(X_train), vectorizer.transform(X_test), vectorizer
+
+        return self.get_or_build(name, vectorizer_config(vectorizer), snapshot, build, y_train, y_test)
+
+    def _entries(self):
+        entries = {}
+        for path in glob.glob(os.path.join(self.directory, '*', META_FILE)):
+            with open(path) as f:
+                name = json.load(f)['name']
+            entries.setdefault(name, []).append((os.path.getmtime(path), os.path.dirname(path)))
+        return entries
+
+    def prune(self, keep=1, names=None):
+        """Delete all but the ``keep`` most recently used entries of every name (or of ``names``).
+
+        Processes that already mapped a deleted entry keep reading it.
+        Returns the deleted entry paths.
+        """
+        removed = []
+        for name, entries in self._entries().items():
+            if names is not None and name not in names:
+                continue
+            for _, path in sorted(entries, reverse=True)[keep:]:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+        return removed
+
+    def open(self, name, key=None):
+        """The entry of ``name`` with ``key`` (a prefix is enough), or the most recent one."""
+        paths = [path for path in glob.glob(self._path(name, key or '') + '*')
+                 if os.path.exists(os.path.join(path, META_FILE))]
+        if not paths:
+            raise KeyError('No stored features for {!r}'.format(name))
+        return StoredLayer(max(paths, key=lambda path: os.path.getmtime(os.path.join(path, META_FILE))))
@@ -0,0 +1,90 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+def weighted_hstack(blocks, weights, dtype=np.float64, chunk_rows=65536):
+    """Horizontally stack CSR ``blocks`` scaled by ``weights`` into one CSR matrix.
+
+    The output arrays are allocated once and filled block by block, so the
+    only temporaries are index arrays for ``chunk_rows`` rows at a time.
+    """
+    blocks = [sp.csr_matrix(block) for block in blocks]
+    n_rows = blocks[0].shape[0]
+    if any(block.shape[0] != n_rows for block in blocks):
+        raise ValueError('All layers must have the same number of rows')
+
+    n_cols = sum(block.shape[1] for block in blocks)
+    nnz = sum(block.nnz for block in blocks)
+    index_dtype = np.int32 if max(n_cols, nnz) < np.iinfo(np.int32).max else np.int64
+
+    indptr = np.zeros(n_rows + 1, dtype=index_dtype)
+    for block in blocks:
+        indptr[1:] += np.diff(block.indptr).astype(index_dtype, copy=False)
+    np.cumsum(indptr, out=indptr)
+
+    data = np.empty(nnz, dtype=dtype)
+    indices = np.empty(nnz, dtype=index_dtype)
+
+    # Where the next block starts inside every output row
+    row_start = indptr[:-1].copy()
+    column_offset = 0
+
+    for block, weight in zip(blocks, weights):
+        row_nnz = np.diff(block.indptr)
+
+        for lo in range(0, n_rows, chunk_rows):
+            hi = min(lo + chunk_rows, n_rows)
+            first, last = block.indptr[lo], block.indptr[hi]
+            if first == last:
+                continue
+
+            shift = np.repeat(row_start[lo:hi] - block.indptr[lo:hi], row_nnz[lo:hi])
+            target = shift + np.arange(first, last, dtype=shift.dtype)
+
+            data[target] = block.data[first:last] * weight
+            indices[target] = block.indices[first:last] + column_offset
+
+        row_start += row_nnz.astype(index_dtype, copy=False)
+        column_offset += block.shape[1]
+
+    return sp.csr_matrix((data, indices, indptr), shape=(n_rows, n_cols))
+
+
+def feature_names(vectorizer):
+    if hasattr(vectorizer, 'get_feature_names_out'):
+        return list(vectorizer.get_feature_names_out())
+    return list(vectorizer.get_feature_names())
+
+
+def layer_size(vectorizer):
+    if hasattr(vectorizer, 'n_features_'):
+        return vectorizer.n_features_
+    return len(feature_names(vectorizer))
+
+
+class WeightedFeatureUnion:
+    """Combines the fitted layer vectorizers into one weighted feature matrix.
+
+    ``layers`` is a list of ``(name, vectorizer, weight)`` tuples; columns
+    follow the order of the layers.
+    """
+
+    def __init__(self, layers, dtype=np.float64, chunk_rows=65536):
+        self.layers = list(layers)
+        self.dtype = dtype
+        self.chunk_rows = chunk_rows
+
+    @property
+    def weights(self):
+        return [weight for _, _, weight in self.layers]
+
+    def layer_sizes(self):
+        return [layer_size(vectorizer) for _, vectorizer, _ in self.layers]
+
+    def combine(self, blocks):
+        """Weight and stack already vectorized layer matrices."""
+        return weighted_hstack(blocks, self.weights, self.dtype, self.chunk_rows)
+
+    def transform(self, inputs):
+        """Vectorize ``inputs[name]`` with every layer and stack the results."""
+        return self.combine([vectorizer.transform(inputs[name]) for name, vectorizer, _ in self.layers])
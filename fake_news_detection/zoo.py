@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import time
+import weakref
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from fake_news_detection.shared import load_csr, save_csr
+
+
+def _fit(estimator, handle, y):
+    X = load_csr(handle)
+    started = time.perf_counter()
+    try:
+        estimator.fit(X, y)
+    except Exception as error:
+        # Returned instead of raised, so one failing fit does not discard the others
+        return None, time.perf_counter() - started, '{}: {}'.format(type(error).__name__, error)
+    return estimator, time.perf_counter() - started, None
+
+
+def _shared_memory_folder():
+    return '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+class ModelZoo:
+    """Fits every queued classifier x feature set pair concurrently across processes.
+
+    ``add_feature_set`` writes the CSR arrays of a training matrix to
+    ``.npy`` files once (in ``/dev/shm`` where available), or takes the
+    handle of files already on disk such as a ``FeatureStore`` entry, and
+    returns the matrix memory-mapped from them, so the caller can drop its
+    own copy.
+    Workers receive only the file paths and map the same pages, so the
+    features stay in memory once however many fits run. Estimators that
+    convert their input (the tree models build a dense or CSC copy) still
+    make that conversion inside their worker.
+
+    A fit that raises is recorded in ``errors`` and left out of ``fitted``.
+    The shared copies are deleted by ``close`` (or leaving a ``with``
+    block), and at the latest when the zoo is garbage collected or the
+    interpreter exits, so a crashed run does not leave them in ``/dev/shm``.
+    """
+
+    def __init__(self, n_jobs=-1, temp_folder=None):
+        self.n_jobs = n_jobs
+        self.directory = tempfile.mkdtemp(prefix='model_zoo-', dir=temp_folder or _shared_memory_folder())
+        self.feature_sets = {}
+        self.models = []
+        self.fitted = {}
+        self.fit_seconds = {}
+        self.errors = {}
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    def add_feature_set(self, name, X, y):
+        """Share training matrix ``X`` with the workers; returns it memory-mapped.
+
+        ``X`` may also be the handle of a matrix already saved as ``.npy``
+        files (``save_csr``, ``StoredLayer.handle``), which is then mapped in
+        place instead of being copied.
+        """
+        if isinstance(X, dict):
+            handle = X
+        else:
+            handle = save_csr(X, self.directory, '{}-{}'.format(len(self.feature_sets), name.replace('/', '_')))
+        self.feature_sets[name] = (handle, np.asarray(y))
+        return load_csr(handle)
+
+    def add_model(self, name, feature_set, estimator):
+        if feature_set not in self.feature_sets:
+            raise KeyError('Unknown feature set {!r}, call add_feature_set first'.format(feature_set))
+        self.models.append((name, feature_set, estimator))
+
+    def fit(self):
+        """Fit every model not fitted yet; returns the fitted models by name.
+
+        Models whose fit raised are missing from the result, with the error
+        in ``errors``; they are retried by the next call.
+        """
+        pending = [model for model in self.models if model[0] not in self.fitted]
+
+        outputs = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit)(estimator, *self.feature_sets[feature_set]) for _, feature_set, estimator in pending
+        )
+
+        for (name, _, _), (estimator, seconds, error) in zip(pending, outputs):
+            self.fit_seconds[name] = seconds
+            if error is None:
+                self.fitted[name] = estimator
+                self.errors.pop(name, None)
+            else:
+                self.errors[name] = error
+        return self.fitted
+
+    def items(self):
+        """``(name, feature_set, fitted estimator)`` for every fitted model, in queue order."""
+        return [(name, feature_set, self.fitted[name]) for name, feature_set, _ in self.models
+                if name in self.fitted]
+
+    def close(self):
+        self._cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()